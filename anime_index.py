@@ -0,0 +1,272 @@
+"""
+動畫資料二進位索引模組
+
+將資料匯出為固定寬度紀錄的二進位索引檔，讀取端以 mmap 開啟後直接以
+二分搜尋查詢 cat_id、標題或季度，不需要載入整份 JSON。
+
+檔案格式（皆為 little-endian）：
+    標頭        HEADER
+    紀錄表      record_count 筆 RECORD，依季度排列
+    cat_id 表   record_count 筆 CAT_ID_ENTRY，依 cat_id 排序
+    標題表      record_count 筆 TITLE_ENTRY，依標題 UTF-8 位元組排序
+    季度表      season_count 筆 SEASON_ENTRY，依年份、季節排序
+    字串池      所有標題的 UTF-8 位元組
+"""
+
+import mmap
+import os
+import struct
+import logging
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'A1IDX\x00\x00\x00'
+VERSION = 1
+
+# magic, version, reserved, record_count, season_count,
+# records/cat_ids/titles/seasons/pool 區段位移, pool_size
+HEADER = struct.Struct('<8sHHIIIIIIII')
+# cat_id, title_offset, title_length, season_index, reserved
+RECORD = struct.Struct('<IIIHH')
+# cat_id, record_index
+CAT_ID_ENTRY = struct.Struct('<II')
+# title_offset, title_length, record_index
+TITLE_ENTRY = struct.Struct('<III')
+# year, season_code, reserved, start, count
+SEASON_ENTRY = struct.Struct('<HBBII')
+
+# 季節代碼，與資料檔案中的英文季節對應
+SEASON_CODES = ['winter', 'spring', 'summer', 'fall']
+
+
+def write_binary_index(data: Dict[str, Any], path: str) -> int:
+    """
+    將動畫資料寫入二進位索引檔
+
+    Args:
+        data: 與資料檔案相同格式的資料字典
+        path: 索引檔路徑
+
+    Returns:
+        寫入的紀錄數量
+    """
+    pool = bytearray()
+    records = []
+    seasons = []
+
+    season_keys = sorted(
+        (int(year_key), SEASON_CODES.index(season_key), year_key, season_key)
+        for year_key, year_data in data.items()
+        for season_key in year_data
+        if season_key in SEASON_CODES
+    )
+    for season_index, (year, season_code, year_key, season_key) in enumerate(season_keys):
+        start = len(records)
+        for anime in data[year_key][season_key]:
+            cat_id = anime.get('cat_id') or ''
+            if not cat_id.isdigit():
+                logger.warning(f"cat_id 不是數字，不寫入索引: {cat_id!r}")
+                continue
+            title = anime.get('title', '').encode('utf-8')
+            records.append((int(cat_id), len(pool), len(title), season_index))
+            pool.extend(title)
+        seasons.append((year, season_code, start, len(records) - start))
+
+    cat_id_table = sorted((record[0], index) for index, record in enumerate(records))
+    title_table = sorted(
+        range(len(records)),
+        key=lambda index: bytes(pool[records[index][1]:records[index][1] + records[index][2]])
+    )
+
+    records_offset = HEADER.size
+    cat_ids_offset = records_offset + RECORD.size * len(records)
+    titles_offset = cat_ids_offset + CAT_ID_ENTRY.size * len(records)
+    seasons_offset = titles_offset + TITLE_ENTRY.size * len(records)
+    pool_offset = seasons_offset + SEASON_ENTRY.size * len(seasons)
+
+    buffer = bytearray(pool_offset + len(pool))
+    HEADER.pack_into(buffer, 0, MAGIC, VERSION, 0, len(records), len(seasons),
+                     records_offset, cat_ids_offset, titles_offset, seasons_offset,
+                     pool_offset, len(pool))
+    for index, (cat_id, title_offset, title_length, season_index) in enumerate(records):
+        RECORD.pack_into(buffer, records_offset + index * RECORD.size,
+                         cat_id, title_offset, title_length, season_index, 0)
+    for index, (cat_id, record_index) in enumerate(cat_id_table):
+        CAT_ID_ENTRY.pack_into(buffer, cat_ids_offset + index * CAT_ID_ENTRY.size,
+                               cat_id, record_index)
+    for index, record_index in enumerate(title_table):
+        _, title_offset, title_length, _ = records[record_index]
+        TITLE_ENTRY.pack_into(buffer, titles_offset + index * TITLE_ENTRY.size,
+                              title_offset, title_length, record_index)
+    for index, (year, season_code, start, count) in enumerate(seasons):
+        SEASON_ENTRY.pack_into(buffer, seasons_offset + index * SEASON_ENTRY.size,
+                               year, season_code, 0, start, count)
+    buffer[pool_offset:] = pool
+
+    # 以取代方式更新，已開啟舊檔的讀取端不受影響
+    dir_name = os.path.dirname(path)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(buffer)
+    os.replace(tmp_path, path)
+
+    return len(records)
+
+
+class AnimeIndexReader:
+    """
+    二進位索引讀取器
+
+    以 mmap 開啟索引檔，所有查詢都直接在映射的記憶體上進行二分搜尋
+    """
+
+    def __init__(self, path: str):
+        """
+        開啟索引檔
+
+        Args:
+            path: 索引檔路徑
+
+        Raises:
+            ValueError: 檔案不是有效的索引檔
+        """
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, _, self.record_count, self.season_count,
+         self.records_offset, self.cat_ids_offset, self.titles_offset,
+         self.seasons_offset, self.pool_offset, _) = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.mm.close()
+            raise ValueError(f"不是有效的動畫索引檔: {path}")
+
+    def __enter__(self) -> 'AnimeIndexReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """關閉記憶體映射"""
+        self.mm.close()
+
+    def _read_record(self, index: int) -> Dict[str, Any]:
+        """
+        讀取一筆紀錄
+
+        Args:
+            index: 紀錄索引
+
+        Returns:
+            包含 title、cat_id、year 和 season 的字典
+        """
+        cat_id, title_offset, title_length, season_index, _ = RECORD.unpack_from(
+            self.mm, self.records_offset + index * RECORD.size)
+        year, season_code, _, _, _ = SEASON_ENTRY.unpack_from(
+            self.mm, self.seasons_offset + season_index * SEASON_ENTRY.size)
+        start = self.pool_offset + title_offset
+        return {
+            'title': self.mm[start:start + title_length].decode('utf-8'),
+            'cat_id': str(cat_id),
+            'year': year,
+            'season': SEASON_CODES[season_code]
+        }
+
+    def _cat_id_at(self, position: int) -> int:
+        """取得 cat_id 表中指定位置的 cat_id"""
+        return CAT_ID_ENTRY.unpack_from(
+            self.mm, self.cat_ids_offset + position * CAT_ID_ENTRY.size)[0]
+
+    def _title_at(self, position: int) -> bytes:
+        """取得標題表中指定位置的標題位元組"""
+        title_offset, title_length, _ = TITLE_ENTRY.unpack_from(
+            self.mm, self.titles_offset + position * TITLE_ENTRY.size)
+        start = self.pool_offset + title_offset
+        return self.mm[start:start + title_length]
+
+    @staticmethod
+    def _lower_bound(key, count: int, key_at) -> int:
+        """二分搜尋第一個不小於 key 的位置"""
+        low, high = 0, count
+        while low < high:
+            mid = (low + high) // 2
+            if key_at(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def lookup_cat_id(self, cat_id: str) -> List[Dict[str, Any]]:
+        """
+        查詢 cat_id 對應的所有紀錄（跨季度的動畫可能有多筆）
+
+        Args:
+            cat_id: 動畫 cat_id
+
+        Returns:
+            紀錄列表，找不到時返回空列表
+        """
+        if not str(cat_id).isdigit():
+            return []
+        key = int(cat_id)
+
+        results = []
+        position = self._lower_bound(key, self.record_count, self._cat_id_at)
+        while position < self.record_count and self._cat_id_at(position) == key:
+            _, record_index = CAT_ID_ENTRY.unpack_from(
+                self.mm, self.cat_ids_offset + position * CAT_ID_ENTRY.size)
+            results.append(self._read_record(record_index))
+            position += 1
+        return results
+
+    def lookup_title(self, title: str) -> List[Dict[str, Any]]:
+        """
+        以完整標題查詢紀錄
+
+        Args:
+            title: 動畫標題
+
+        Returns:
+            紀錄列表，找不到時返回空列表
+        """
+        key = title.encode('utf-8')
+
+        results = []
+        position = self._lower_bound(key, self.record_count, self._title_at)
+        while position < self.record_count and self._title_at(position) == key:
+            _, _, record_index = TITLE_ENTRY.unpack_from(
+                self.mm, self.titles_offset + position * TITLE_ENTRY.size)
+            results.append(self._read_record(record_index))
+            position += 1
+        return results
+
+    def get_season(self, year: int, season: str) -> Optional[List[Dict[str, Any]]]:
+        """
+        取得單一季度的所有紀錄
+
+        Args:
+            year: 年份
+            season: 季節（英文）
+
+        Returns:
+            紀錄列表，如果季度不存在則返回 None
+        """
+        if season not in SEASON_CODES:
+            return None
+        key = (int(year), SEASON_CODES.index(season))
+
+        def season_at(position: int):
+            entry = SEASON_ENTRY.unpack_from(
+                self.mm, self.seasons_offset + position * SEASON_ENTRY.size)
+            return entry[0], entry[1]
+
+        position = self._lower_bound(key, self.season_count, season_at)
+        if position >= self.season_count or season_at(position) != key:
+            return None
+
+        _, _, _, start, count = SEASON_ENTRY.unpack_from(
+            self.mm, self.seasons_offset + position * SEASON_ENTRY.size)
+        return [self._read_record(index) for index in range(start, start + count)]
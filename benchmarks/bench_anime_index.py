@@ -0,0 +1,99 @@
+"""
+二進位索引查詢效能比較
+
+比較「json.load 整份資料後查詢」與「mmap 開啟二進位索引後查詢」的冷查詢延遲。
+每一輪都重新開啟檔案，模擬外部工具啟動後只查詢少數 cat_id 與標題的情境。
+
+使用方法:
+    python benchmarks/bench_anime_index.py [--rounds 200]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 將父目錄添加到 Python 路徑，以便導入主程式模組
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from anime_index import AnimeIndexReader, write_binary_index
+from config import DATA_CONFIG
+
+
+def lookup_with_json(json_path: str, cat_ids, titles) -> int:
+    """以 json.load 載入整份資料後查詢"""
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    found = 0
+    for year_data in data.values():
+        for anime_list in year_data.values():
+            for anime in anime_list:
+                if anime['cat_id'] in cat_ids or anime['title'] in titles:
+                    found += 1
+    return found
+
+
+def lookup_with_index(index_path: str, cat_ids, titles) -> int:
+    """以 mmap 開啟二進位索引後查詢"""
+    found = 0
+    with AnimeIndexReader(index_path) as reader:
+        for cat_id in cat_ids:
+            found += len(reader.lookup_cat_id(cat_id))
+        for title in titles:
+            found += len(reader.lookup_title(title))
+    return found
+
+
+def measure(func, rounds: int, *args) -> float:
+    """執行多輪並返回每輪的中位數延遲（秒）"""
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="二進位索引查詢效能比較")
+    arg_parser.add_argument('--rounds', type=int, default=200, help="每種方式執行的輪數")
+    arg_parser.add_argument('--data', default=DATA_CONFIG['output_file'], help="JSON 資料檔案")
+    args = arg_parser.parse_args()
+
+    with open(args.data, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    all_anime = [anime for year_data in data.values()
+                 for anime_list in year_data.values() for anime in anime_list]
+    sample = all_anime[::max(len(all_anime) // 5, 1)][:5]
+    cat_ids = {anime['cat_id'] for anime in sample}
+    titles = {anime['title'] for anime in sample}
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        index_path = os.path.join(tmp_dir, 'anime_data.idx')
+        count = write_binary_index(data, index_path)
+
+        print(f"紀錄數: {count}")
+        print(f"JSON 大小: {os.path.getsize(args.data):,} bytes，"
+              f"索引大小: {os.path.getsize(index_path):,} bytes")
+
+        scenarios = [
+            ("查詢 1 個 cat_id", {next(iter(cat_ids))}, set()),
+            (f"查詢 {len(cat_ids)} 個 cat_id 與 {len(titles)} 個標題", cat_ids, titles)
+        ]
+        for name, scenario_cat_ids, scenario_titles in scenarios:
+            json_time = measure(lookup_with_json, args.rounds, args.data,
+                                scenario_cat_ids, scenario_titles)
+            index_time = measure(lookup_with_index, args.rounds, index_path,
+                                 scenario_cat_ids, scenario_titles)
+            print(f"{name}（含開檔，中位數，{args.rounds} 輪）:")
+            print(f"  json.load + 掃描: {json_time * 1e6:10.1f} µs")
+            print(f"  mmap 索引查詢:    {index_time * 1e6:10.1f} µs")
+            print(f"  加速倍數: {json_time / index_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
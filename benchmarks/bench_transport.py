@@ -0,0 +1,260 @@
+"""
+傳輸層效能比較
+
+在本機啟動模擬站台（HTTP/1.1 與 HTTP/2 明文 h2c 各一個，每個請求都有相同的
+伺服器處理延遲），比較以下抓取方式抓取多個頁面的延遲與吞吐量：
+
+- requests.get：每個請求各自建立連線（原本的做法）
+- RequestsTransport：HTTP/1.1 keep-alive，依序抓取
+- requests.Session 連線池：HTTP/1.1 以相同並行數量在多條 keep-alive 連線上並行抓取
+- HTTP2Transport：依序抓取，以及在同一條連線上多工並行抓取
+
+兩種並行方式使用相同的並行數量，差異只在 HTTP/1.1 多條連線與 HTTP/2 單一連線多工。
+
+需要安裝 httpx[http2]。
+
+使用方法:
+    python benchmarks/bench_transport.py [--pages 100] [--latency 0.02]
+"""
+
+import argparse
+import asyncio
+import socket
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# 將父目錄添加到 Python 路徑，以便導入主程式模組
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from transport import HTTP2Transport, RequestsTransport
+from utils import RateLimiter
+
+try:
+    import h2.config
+    import h2.connection
+    import h2.events
+except ImportError:
+    h2 = None
+
+
+def make_page(size: int) -> bytes:
+    """產生與季度頁面大小相近的 HTML"""
+    row = '<tr><td><a href="https://anime1.me/?cat=1">測試動畫</a></td></tr>'
+    rows = row * (size // len(row.encode('utf-8')) + 1)
+    return f'<html><body><table>{rows}</table></body></html>'.encode('utf-8')
+
+
+def start_http1_server(body: bytes, latency: float) -> ThreadingHTTPServer:
+    """啟動 HTTP/1.1 模擬站台（每個連線一個執行緒）"""
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def setup(self):
+            super().setup()
+            # 標頭與內容分開寫入，關閉 Nagle 避免與延遲 ACK 互相等待
+            self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+        def do_GET(self):
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class H2Protocol(asyncio.Protocol):
+    """HTTP/2 明文（prior knowledge）模擬站台，每個串流獨立延遲後回應"""
+
+    # 建立過的連線數量，供測試確認連線重複使用
+    connections_made = 0
+
+    def __init__(self, body: bytes, latency: float):
+        self.body = body
+        self.latency = latency
+        self.conn = h2.connection.H2Connection(
+            config=h2.config.H2Configuration(client_side=False))
+        self.window_updated = None
+
+    def connection_made(self, transport):
+        H2Protocol.connections_made += 1
+        self.transport = transport
+        self.window_updated = asyncio.Event()
+        self.conn.initiate_connection()
+        self.transport.write(self.conn.data_to_send())
+
+    def data_received(self, data):
+        for event in self.conn.receive_data(data):
+            if isinstance(event, h2.events.RequestReceived):
+                asyncio.ensure_future(self.respond(event.stream_id))
+            elif isinstance(event, h2.events.WindowUpdated):
+                self.window_updated.set()
+            elif isinstance(event, h2.events.ConnectionTerminated):
+                self.transport.close()
+        self.transport.write(self.conn.data_to_send())
+
+    async def respond(self, stream_id: int):
+        await asyncio.sleep(self.latency)
+        self.conn.send_headers(stream_id, [
+            (':status', '200'),
+            ('content-type', 'text/html; charset=utf-8'),
+            ('content-length', str(len(self.body)))
+        ])
+
+        # 依流量控制視窗分段送出內容
+        remaining = memoryview(self.body)
+        while remaining:
+            window = min(self.conn.local_flow_control_window(stream_id),
+                         self.conn.max_outbound_frame_size)
+            if window <= 0:
+                self.window_updated.clear()
+                self.transport.write(self.conn.data_to_send())
+                await self.window_updated.wait()
+                continue
+            chunk, remaining = remaining[:window], remaining[window:]
+            self.conn.send_data(stream_id, bytes(chunk), end_stream=not remaining)
+        self.transport.write(self.conn.data_to_send())
+
+
+def start_http2_server(body: bytes, latency: float) -> int:
+    """在背景執行緒啟動 HTTP/2 模擬站台，返回連接埠"""
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    port = []
+
+    async def serve():
+        server = await loop.create_server(lambda: H2Protocol(body, latency), '127.0.0.1', 0)
+        port.append(server.sockets[0].getsockname()[1])
+        started.set()
+        await server.serve_forever()
+
+    threading.Thread(target=lambda: loop.run_until_complete(serve()), daemon=True).start()
+    started.wait()
+    return port[0]
+
+
+def run_sequential(get, urls):
+    """依序抓取，返回總時間與每個請求的延遲"""
+    latencies = []
+    start = time.perf_counter()
+    for url in urls:
+        request_start = time.perf_counter()
+        response = get(url)
+        response.raise_for_status()
+        latencies.append(time.perf_counter() - request_start)
+    return time.perf_counter() - start, latencies
+
+
+def run_concurrent(get, urls, concurrency: int):
+    """以固定數量的執行緒並行抓取，返回總時間、每個請求的延遲與回應列表"""
+    latencies = []
+
+    def timed_get(url):
+        request_start = time.perf_counter()
+        response = get(url)
+        latencies.append(time.perf_counter() - request_start)
+        return response
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        responses = list(pool.map(timed_get, urls))
+    elapsed = time.perf_counter() - start
+
+    assert all(r.status_code == 200 for r in responses)
+    return elapsed, latencies, responses
+
+
+def run_get_many(transport, urls):
+    """以傳輸的 get_many 並行抓取，返回總時間、每個請求的延遲與回應列表"""
+    start = time.perf_counter()
+    responses = transport.get_many(urls)
+    elapsed = time.perf_counter() - start
+
+    assert all(r.status_code == 200 for r in responses)
+    return elapsed, [r.elapsed.total_seconds() for r in responses], responses
+
+
+def make_pooled_session(concurrency: int) -> requests.Session:
+    """建立連線池大小與並行數量相同的 requests.Session"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def report(name: str, pages: int, elapsed: float, latencies) -> None:
+    """輸出單一抓取方式的結果"""
+    print(f"  {name:<34} 總時間 {elapsed:7.3f} s  "
+          f"中位延遲 {statistics.median(latencies) * 1000:8.1f} ms  "
+          f"吞吐量 {pages / elapsed:8.1f} 頁/秒")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="傳輸層效能比較")
+    arg_parser.add_argument('--pages', type=int, default=100, help="抓取的頁面數量")
+    arg_parser.add_argument('--latency', type=float, default=0.02, help="模擬的伺服器處理延遲（秒）")
+    arg_parser.add_argument('--page-size', type=int, default=20000, help="頁面大小（位元組）")
+    arg_parser.add_argument('--concurrency', type=int, default=16, help="並行請求數量")
+    args = arg_parser.parse_args()
+
+    if h2 is None:
+        sys.exit("需要安裝 httpx[http2] 才能執行此效能比較")
+
+    body = make_page(args.page_size)
+    http1_server = start_http1_server(body, args.latency)
+    http1_base = f"http://127.0.0.1:{http1_server.server_address[1]}"
+    http2_base = f"http://127.0.0.1:{start_http2_server(body, args.latency)}"
+
+    http1_urls = [f"{http1_base}/page/{i}" for i in range(args.pages)]
+    http2_urls = [f"{http2_base}/page/{i}" for i in range(args.pages)]
+
+    print(f"抓取 {args.pages} 個頁面（每頁 {len(body):,} bytes，伺服器延遲 {args.latency * 1000:.0f} ms）:")
+
+    elapsed, latencies = run_sequential(requests.get, http1_urls)
+    report("requests.get（每次新連線）", args.pages, elapsed, latencies)
+
+    # 效能比較不套用爬取時的速率限制
+    no_limit = RateLimiter(0)
+
+    http1 = RequestsTransport(rate_limiter=no_limit)
+    elapsed, latencies = run_sequential(http1.get, http1_urls)
+    report("HTTP/1.1 keep-alive 依序", args.pages, elapsed, latencies)
+    http1.close()
+
+    session = make_pooled_session(args.concurrency)
+    elapsed, latencies, _ = run_concurrent(session.get, http1_urls, args.concurrency)
+    report(f"HTTP/1.1 連線池並行（{args.concurrency} 連線）", args.pages, elapsed, latencies)
+    session.close()
+
+    http2 = HTTP2Transport(max_concurrency=args.concurrency, prior_knowledge=True,
+                           rate_limiter=no_limit)
+    elapsed, latencies = run_sequential(http2.get, http2_urls)
+    report("HTTP/2 依序", args.pages, elapsed, latencies)
+    elapsed, latencies, responses = run_get_many(http2, http2_urls)
+    assert all(r.http_version == 'HTTP/2' for r in responses)
+    report(f"HTTP/2 多工並行（{args.concurrency} 串流）", args.pages, elapsed, latencies)
+    http2.close()
+
+    http1_server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -13,11 +13,62 @@ REQUEST_CONFIG = {
     'season_delay_range': (3, 5)   # 季節間延遲範圍（秒）
 }
 
+# 傳輸層配置
+TRANSPORT_CONFIG = {
+    'type': 'http1',        # 'http1'（requests）或 'http2'（httpx[http2]，未安裝時退回 http1）
+    'max_concurrency': 8,   # HTTP/2 並行抓取時同時進行的請求數量
+    'min_request_interval': 1.0,  # 批次抓取時相鄰請求開始之間的最短間隔（秒），與爬取延遲下限一致
+    'timeout': 30           # 單一請求逾時（秒）
+}
+
 # 資料配置
 DATA_CONFIG = {
     'output_file': 'docs/anime_data.json',
+    'index_file': 'docs/anime_data.idx',  # 供外部工具 mmap 查詢的二進位索引
     'start_year': 2017,
-    'recent_seasons_count': 3
+    'recent_seasons_count': 3,
+    'write_debounce_interval': 1.0  # 背景寫入合併請求的等待時間（秒）
+}
+
+# 分片爬取配置
+SHARD_CONFIG = {
+    'coordination_db': 'shards/coordination.db',  # 共享協調資料庫（SQLite，需位於本機檔案系統）
+    'partial_dir': 'shards/partial',              # 各工作者的部分結果目錄
+    'lease_seconds': 300,                         # 工作單元租約有效時間（秒）
+    'max_attempts': 3,                            # 工作單元失敗幾次後不再重試
+    'poll_interval': 10                           # 等待其他工作者租約時的輪詢間隔（秒）
+}
+
+# 自適應更新排程配置
+SCHEDULER_CONFIG = {
+    'state_file': 'state/refresh_state.json',  # 各季度檢查與變更紀錄
+    'min_interval': 3600,                      # 當季最短檢查間隔（秒），每小時
+    'max_interval': 30 * 24 * 3600,            # 最長檢查間隔（秒），每月
+    'age_decay': 4,                            # 每舊一季，最短檢查間隔放大的倍數
+    'history_size': 20,                        # 每季保留的變更時間筆數
+    'checks_per_change': 4,                    # 估計的每個變更週期內檢查幾次
+    'tick_interval': 300                       # 常駐模式最長休眠時間（秒）
+}
+
+# 版本化快照配置
+SNAPSHOT_CONFIG = {
+    'root': 'snapshots',  # 快照根目錄（blobs/ 與 manifests/）
+    'cache_size': 64      # 已解碼季度的 LRU 快取數量
+}
+
+# 網頁封存配置
+ARCHIVE_CONFIG = {
+    'path': 'archive/pages.warc.gz'  # 封存檔路徑，索引檔為同名加上 .idx
+}
+
+# 圖片下載配置
+MEDIA_CONFIG = {
+    'root': 'docs/media',           # 圖片根目錄（originals/ 與 thumbs/）
+    'download_workers': 4,          # 同時下載的執行緒數量
+    'thumbnail_workers': None,      # 產生縮圖的行程數量，None 為 CPU 核心數
+    'thumbnail_size': (320, 320),   # 縮圖最大寬高（像素）
+    'min_request_interval': 1.0,    # 所有圖片下載請求之間的最短間隔（秒）
+    'page_batch_size': 8            # 每批透過抓取層並行抓取的動畫分類頁面數量
 }
 
 # 季節對應
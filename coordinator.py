@@ -0,0 +1,386 @@
+"""
+分片爬取協調模組
+
+同一台主機上的多個工作者行程透過共享的 SQLite 資料庫以租約（lease）方式領取工作單元，
+租約逾期的工作單元會自動被其他工作者重新領取。
+"""
+
+import contextlib
+import glob
+import json
+import os
+import sqlite3
+import threading
+import time
+import logging
+from typing import Dict, Any, List, Optional
+
+from config import SHARD_CONFIG
+from data_manager import AnimeDataManager
+
+logger = logging.getLogger(__name__)
+
+# 工作單元狀態
+STATUS_PENDING = 'pending'
+STATUS_LEASED = 'leased'
+STATUS_DONE = 'done'
+STATUS_FAILED = 'failed'
+
+
+class LeaseCoordinator:
+    """
+    租約式工作分配協調器
+
+    以 SQLite 作為共享協調儲存，每個工作單元同一時間只會租給一個工作者
+    """
+
+    def __init__(self, db_path: str = None, lease_seconds: float = None,
+                 max_attempts: int = None):
+        """
+        初始化協調器
+
+        Args:
+            db_path: 協調資料庫路徑，預設使用配置檔案中的設定
+            lease_seconds: 租約有效時間（秒），預設使用配置檔案中的設定
+            max_attempts: 工作單元失敗幾次後不再重試，預設使用配置檔案中的設定
+        """
+        self.db_path = db_path or SHARD_CONFIG['coordination_db']
+        self.lease_seconds = (lease_seconds if lease_seconds is not None
+                              else SHARD_CONFIG['lease_seconds'])
+        self.max_attempts = max_attempts or SHARD_CONFIG['max_attempts']
+        # 租約續約在另一個執行緒進行，共用連線時以鎖保護
+        self.lock = threading.RLock()
+
+        dir_name = os.path.dirname(self.db_path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+
+        # 自行控制交易，避免 sqlite3 模組隱式開啟交易
+        self.conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None,
+                                    check_same_thread=False)
+        self._create_schema()
+
+    def _create_schema(self) -> None:
+        """建立工作單元資料表"""
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS work_units (
+                unit_id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                owner TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # 舊版資料庫沒有 attempts 欄位
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(work_units)")]
+        if 'attempts' not in columns:
+            self.conn.execute(
+                "ALTER TABLE work_units ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    def register_units(self, units: List[Dict[str, Any]]) -> int:
+        """
+        登記工作單元，已存在的單元不會被覆蓋
+
+        Args:
+            units: 工作單元列表，每個單元包含 unit_id、kind 和 payload
+
+        Returns:
+            新登記的單元數量
+        """
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                before = self.conn.total_changes
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO work_units (unit_id, kind, payload) VALUES (?, ?, ?)",
+                    [(u['unit_id'], u['kind'], json.dumps(u['payload'], ensure_ascii=False))
+                     for u in units]
+                )
+                self.conn.execute("COMMIT")
+                return self.conn.total_changes - before
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        領取一個待處理或租約已逾期的工作單元
+
+        Args:
+            worker_id: 工作者識別碼
+
+        Returns:
+            工作單元字典，如果沒有可領取的單元則返回 None
+        """
+        now = time.time()
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(
+                    """
+                    SELECT unit_id, kind, payload, status, owner FROM work_units
+                    WHERE status = ? OR (status = ? AND lease_expires < ?)
+                    ORDER BY unit_id LIMIT 1
+                    """,
+                    (STATUS_PENDING, STATUS_LEASED, now)
+                ).fetchone()
+
+                if row is None:
+                    self.conn.execute("COMMIT")
+                    return None
+
+                unit_id, kind, payload, status, previous_owner = row
+                self.conn.execute(
+                    "UPDATE work_units SET status = ?, owner = ?, lease_expires = ? WHERE unit_id = ?",
+                    (STATUS_LEASED, worker_id, now + self.lease_seconds, unit_id)
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+
+        if status == STATUS_LEASED:
+            logger.warning(f"收回工作者 {previous_owner} 逾期的租約: {unit_id}")
+
+        return {'unit_id': unit_id, 'kind': kind, 'payload': json.loads(payload)}
+
+    def _update_owned(self, unit_id: str, worker_id: str, status: str,
+                      lease_expires: Optional[float]) -> bool:
+        """
+        更新工作者仍持有租約的工作單元
+
+        Returns:
+            True 如果更新成功，False 如果租約已被其他工作者取得
+        """
+        with self.lock:
+            cursor = self.conn.execute(
+                """
+                UPDATE work_units SET status = ?, lease_expires = ?
+                WHERE unit_id = ? AND owner = ? AND status = ?
+                """,
+                (status, lease_expires, unit_id, worker_id, STATUS_LEASED)
+            )
+            return cursor.rowcount == 1
+
+    def renew(self, unit_id: str, worker_id: str) -> bool:
+        """
+        延長工作單元的租約
+
+        Args:
+            unit_id: 工作單元識別碼
+            worker_id: 工作者識別碼
+
+        Returns:
+            True 如果仍持有租約，否則 False
+        """
+        return self._update_owned(unit_id, worker_id, STATUS_LEASED,
+                                  time.time() + self.lease_seconds)
+
+    @contextlib.contextmanager
+    def keep_alive(self, unit_id: str, worker_id: str):
+        """
+        在區塊執行期間於背景定期續約，避免長時間的爬取（含重試）讓租約逾期
+
+        Args:
+            unit_id: 工作單元識別碼
+            worker_id: 工作者識別碼
+        """
+        stop = threading.Event()
+
+        def renew_periodically():
+            while not stop.wait(self.lease_seconds / 3):
+                try:
+                    if not self.renew(unit_id, worker_id):
+                        logger.warning(f"無法續約工作單元 {unit_id}，租約已被其他工作者取得")
+                        return
+                except sqlite3.Error as e:
+                    logger.warning(f"續約工作單元 {unit_id} 時發生錯誤: {str(e)}")
+
+        thread = threading.Thread(target=renew_periodically, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def complete(self, unit_id: str, worker_id: str) -> bool:
+        """
+        將工作單元標記為完成
+
+        Args:
+            unit_id: 工作單元識別碼
+            worker_id: 工作者識別碼
+
+        Returns:
+            True 如果標記成功，False 如果租約已失效
+        """
+        return self._update_owned(unit_id, worker_id, STATUS_DONE, None)
+
+    def fail(self, unit_id: str, worker_id: str) -> bool:
+        """
+        記錄工作單元失敗一次並放回待處理，達到最大嘗試次數後標記為失敗不再領取
+
+        Args:
+            unit_id: 工作單元識別碼
+            worker_id: 工作者識別碼
+
+        Returns:
+            True 如果記錄成功，False 如果租約已失效
+        """
+        with self.lock:
+            cursor = self.conn.execute(
+                """
+                UPDATE work_units
+                SET attempts = attempts + 1,
+                    status = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END,
+                    owner = NULL, lease_expires = NULL
+                WHERE unit_id = ? AND owner = ? AND status = ?
+                """,
+                (self.max_attempts, STATUS_FAILED, STATUS_PENDING,
+                 unit_id, worker_id, STATUS_LEASED)
+            )
+            if cursor.rowcount != 1:
+                return False
+
+            attempts, status = self.conn.execute(
+                "SELECT attempts, status FROM work_units WHERE unit_id = ?", (unit_id,)
+            ).fetchone()
+
+        if status == STATUS_FAILED:
+            logger.error(f"工作單元 {unit_id} 已失敗 {attempts} 次，不再重試")
+        else:
+            logger.warning(f"工作單元 {unit_id} 失敗（{attempts}/{self.max_attempts}），放回待處理")
+        return True
+
+    def remaining(self) -> int:
+        """
+        計算尚未完成的工作單元數量（待處理或租約中）
+
+        Returns:
+            未完成的工作單元數量
+        """
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT COUNT(*) FROM work_units WHERE status IN (?, ?)",
+                (STATUS_PENDING, STATUS_LEASED)
+            ).fetchone()
+        return row[0]
+
+    def reset(self) -> int:
+        """
+        清除所有工作單元（包含已完成與已失敗的單元），讓下一輪回補重新登記
+
+        Returns:
+            清除的工作單元數量
+        """
+        with self.lock:
+            cursor = self.conn.execute("DELETE FROM work_units")
+            return cursor.rowcount
+
+    def close(self) -> None:
+        """關閉資料庫連線"""
+        with self.lock:
+            self.conn.close()
+
+
+def make_season_unit(year: int, season: str) -> Dict[str, Any]:
+    """
+    建立季度工作單元
+
+    Args:
+        year: 年份
+        season: 季節（中文）
+
+    Returns:
+        工作單元字典
+    """
+    return {
+        'unit_id': f"season:{year}:{season}",
+        'kind': 'season',
+        'payload': {'year': year, 'season': season}
+    }
+
+
+def get_partial_filename(worker_id: str, partial_dir: str = None) -> str:
+    """
+    取得工作者的部分結果檔案路徑
+
+    Args:
+        worker_id: 工作者識別碼
+        partial_dir: 部分結果目錄，預設使用配置檔案中的設定
+
+    Returns:
+        部分結果檔案路徑
+    """
+    partial_dir = partial_dir or SHARD_CONFIG['partial_dir']
+    return os.path.join(partial_dir, f"{worker_id}.json")
+
+
+def reset_shards(coordinator: LeaseCoordinator = None, partial_dir: str = None) -> int:
+    """
+    開始新一輪分片爬取：清除協調資料庫中的工作單元與上一輪的部分結果檔案
+
+    工作單元完成後不會再被領取，不重設的話之後的 --worker 會直接結束，
+    --merge-shards 也只會合併上一輪留下的結果。應在所有工作者結束後執行。
+
+    Args:
+        coordinator: 租約協調器，預設使用配置檔案中的協調資料庫
+        partial_dir: 部分結果目錄，預設使用配置檔案中的設定
+
+    Returns:
+        清除的工作單元數量
+    """
+    coordinator = coordinator or LeaseCoordinator()
+    partial_dir = partial_dir or SHARD_CONFIG['partial_dir']
+
+    if coordinator.remaining() > 0:
+        logger.warning("仍有未完成的工作單元，重設後正在執行的工作者的結果將不會被合併")
+    count = coordinator.reset()
+
+    for path in glob.glob(os.path.join(partial_dir, '*.json')):
+        os.remove(path)
+
+    logger.info(f"已清除 {count} 個工作單元與部分結果，可開始新一輪分片爬取")
+    return count
+
+
+def merge_partial_results(data_manager: AnimeDataManager, partial_dir: str = None) -> int:
+    """
+    將所有工作者的部分結果依檔名順序併入資料管理器
+
+    Args:
+        data_manager: 目標資料管理器
+        partial_dir: 部分結果目錄，預設使用配置檔案中的設定
+
+    Returns:
+        合併的動畫筆數
+    """
+    partial_dir = partial_dir or SHARD_CONFIG['partial_dir']
+
+    merged = {}
+    for path in sorted(glob.glob(os.path.join(partial_dir, '*.json'))):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                partial = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"無法載入部分結果 {path}: {str(e)}")
+            continue
+
+        # 後面的檔案覆蓋前面的相同 cat_id，合併順序只取決於檔名
+        for year_str, year_data in partial.items():
+            for season, anime_list in year_data.items():
+                season_data = merged.setdefault(year_str, {}).setdefault(season, {})
+                for anime_info in anime_list:
+                    if anime_info.get('cat_id'):
+                        season_data[anime_info['cat_id']] = anime_info
+
+    folded = {
+        year_str: {season: list(by_cat_id.values()) for season, by_cat_id in year_data.items()}
+        for year_str, year_data in merged.items()
+    }
+    count = data_manager.merge_data(folded)
+    logger.info(f"已合併 {count} 筆部分結果")
+    return count
@@ -4,16 +4,130 @@
 
 import json
 import os
+import queue
 import threading
+import time
 import logging
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from pathlib import Path
 
 from config import DATA_CONFIG
+from snapshot_store import SnapshotStore
+from anime_index import write_binary_index
 
 logger = logging.getLogger(__name__)
 
 
+class BackgroundWriter:
+    """
+    背景寫入執行緒
+    
+    接收寫入請求並在防抖間隔內合併成一次寫入，讓爬取執行緒不必等待磁碟
+    """
+    
+    def __init__(self, write_func, debounce_interval: float = None):
+        """
+        初始化並啟動背景寫入執行緒
+        
+        Args:
+            write_func: 實際執行寫入的函數
+            debounce_interval: 合併寫入請求的等待時間（秒），預設使用配置檔案中的設定
+        """
+        self.write_func = write_func
+        self.debounce_interval = (debounce_interval if debounce_interval is not None
+                                  else DATA_CONFIG['write_debounce_interval'])
+        self.queue = queue.Queue()
+        self._flush_requested = threading.Event()
+        
+        # 統計資料
+        self.request_count = 0
+        self.write_count = 0
+        self.total_write_latency = 0.0
+        self.max_write_latency = 0.0
+        
+        self.thread = threading.Thread(target=self._run, name='anime-data-writer', daemon=True)
+        self.thread.start()
+    
+    def request_write(self) -> None:
+        """提出寫入請求，立即返回"""
+        self.queue.put(True)
+    
+    def _drain(self) -> List[bool]:
+        """取出佇列中所有待處理的請求"""
+        items = []
+        while True:
+            try:
+                items.append(self.queue.get_nowait())
+            except queue.Empty:
+                return items
+    
+    def _run(self) -> None:
+        """寫入執行緒主迴圈"""
+        running = True
+        while running:
+            items = [self.queue.get()]
+            # 等待防抖間隔，期間的請求合併為同一次寫入
+            if items[0] is not None:
+                self._flush_requested.wait(self.debounce_interval)
+            self._flush_requested.clear()
+            items.extend(self._drain())
+            
+            pending = sum(1 for item in items if item is not None)
+            running = None not in items
+            if pending:
+                self._write(pending)
+            
+            for _ in items:
+                self.queue.task_done()
+    
+    def _write(self, pending: int) -> None:
+        """執行一次寫入並記錄延遲"""
+        start = time.perf_counter()
+        try:
+            self.write_func()
+        except Exception as e:
+            logger.error(f"背景寫入時發生錯誤: {str(e)}")
+        latency = time.perf_counter() - start
+        
+        self.request_count += pending
+        self.write_count += 1
+        self.total_write_latency += latency
+        self.max_write_latency = max(self.max_write_latency, latency)
+    
+    def flush(self) -> None:
+        """略過防抖等待，阻塞直到所有已提出的請求都寫入完成"""
+        self._flush_requested.set()
+        self.queue.join()
+        # 佇列原本就是空的時，執行緒不會清除旗標，避免下一批請求略過防抖
+        self._flush_requested.clear()
+    
+    def close(self) -> None:
+        """寫入剩餘的請求並停止執行緒"""
+        self._flush_requested.set()
+        self.queue.put(None)
+        self.thread.join()
+        
+        stats = self.get_stats()
+        logger.info(f"背景寫入結束: {stats['requests']} 個請求合併為 {stats['writes']} 次寫入，"
+                    f"平均寫入延遲 {stats['avg_write_latency'] * 1000:.1f} ms")
+    
+    def get_stats(self) -> Dict[str, float]:
+        """
+        獲取寫入統計
+        
+        Returns:
+            包含請求數、寫入數、合併比例與寫入延遲（秒）的字典
+        """
+        writes = self.write_count
+        return {
+            'requests': self.request_count,
+            'writes': writes,
+            'coalescing_ratio': self.request_count / writes if writes else 0.0,
+            'avg_write_latency': self.total_write_latency / writes if writes else 0.0,
+            'max_write_latency': self.max_write_latency
+        }
+
+
 class AnimeDataManager:
     """
     動畫資料管理器
@@ -32,6 +146,7 @@ class AnimeDataManager:
         self.data_lock = threading.Lock()
         self.file_lock = threading.Lock()
         self.data = self._load_existing_data()
+        self.writer: Optional[BackgroundWriter] = None
         
         # 確保輸出目錄存在
         self._ensure_output_directory()
@@ -120,8 +235,9 @@ class AnimeDataManager:
             existing_index = self._find_existing_anime_index(anime_list, anime_info)
 
             if existing_index != -1:
-                # 更新現有動畫資訊
-                self.data[year_str][season][existing_index] = anime_info
+                # 更新現有動畫資訊，保留圖片等其他階段寫入的欄位
+                existing = self.data[year_str][season][existing_index]
+                self.data[year_str][season][existing_index] = {**existing, **anime_info}
                 logger.info(f"更新動畫資訊: {anime_info.get('title', 'Unknown')}")
             else:
                 # 新增動畫資訊
@@ -129,20 +245,156 @@ class AnimeDataManager:
                 logger.info(f"新增動畫資訊: {anime_info.get('title', 'Unknown')}")
 
         # 寫入檔案
-        self._save_to_file()
+        self._request_save()
+    
+    def update_anime_fields(self, cat_id: str, fields: Dict[str, Any]) -> int:
+        """
+        更新所有季度中指定 cat_id 動畫的欄位
+        
+        Args:
+            cat_id: 動畫 cat_id
+            fields: 要新增或更新的欄位，值為 None 的欄位會被移除
+            
+        Returns:
+            更新的動畫筆數
+        """
+        updated = 0
+        with self.data_lock:
+            for year_data in self.data.values():
+                for anime_list in year_data.values():
+                    for i, anime in enumerate(anime_list):
+                        if anime.get('cat_id') == cat_id:
+                            # 替換而不就地修改，其他執行緒持有的舊字典內容不會改變
+                            merged = {**anime, **fields}
+                            anime_list[i] = {k: v for k, v in merged.items() if v is not None}
+                            updated += 1
+        
+        if updated:
+            self._request_save()
+        return updated
+    
+    def merge_data(self, data: Dict[str, Any]) -> int:
+        """
+        將另一份資料併入目前的資料並寫入檔案一次
+        
+        依年份、季節、cat_id 的排序順序合併，相同 cat_id 的動畫以傳入的資料為準，
+        因此以相同順序合併同一批資料時結果是確定的。
+        
+        Args:
+            data: 與資料檔案相同格式的資料字典
+            
+        Returns:
+            合併的動畫筆數
+        """
+        merged_count = 0
+        with self.data_lock:
+            for year_str in sorted(data):
+                for season in sorted(data[year_str]):
+                    anime_list = self.data.setdefault(year_str, {}).setdefault(season, [])
+                    incoming = sorted(
+                        data[year_str][season],
+                        key=lambda x: x.get('cat_id') or ''
+                    )
+                    for anime_info in incoming:
+                        if not anime_info.get('cat_id'):
+                            continue
+                        existing_index = self._find_existing_anime_index(anime_list, anime_info)
+                        if existing_index != -1:
+                            anime_list[existing_index] = {**anime_list[existing_index], **anime_info}
+                        else:
+                            anime_list.append(anime_info)
+                        merged_count += 1
+        
+        self._request_save()
+        return merged_count
+    
+    def start_background_writer(self, debounce_interval: float = None) -> BackgroundWriter:
+        """
+        啟動背景寫入執行緒，之後的保存請求改由背景執行緒合併寫入
+        
+        Args:
+            debounce_interval: 合併寫入請求的等待時間（秒），預設使用配置檔案中的設定
+            
+        Returns:
+            背景寫入器
+        """
+        if self.writer is None:
+            self.writer = BackgroundWriter(self._save_to_file, debounce_interval)
+        return self.writer
+    
+    def flush(self) -> None:
+        """等待所有待處理的保存請求寫入完成"""
+        if self.writer is not None:
+            self.writer.flush()
+    
+    def close(self) -> None:
+        """寫入剩餘的保存請求並停止背景寫入執行緒"""
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+    
+    def _request_save(self) -> None:
+        """保存資料，有背景寫入執行緒時交由其處理"""
+        if self.writer is not None:
+            self.writer.request_write()
+        else:
+            self._save_to_file()
     
     def _save_to_file(self) -> None:
         """將資料保存到檔案"""
         with self.file_lock:
             try:
+                # 在鎖內複製列表與每筆動畫，排序和寫入在鎖外進行
+                with self.data_lock:
+                    data_copy = {
+                        year_key: {season_key: [dict(anime) for anime in anime_list]
+                                   for season_key, anime_list in year_data.items()}
+                        for year_key, year_data in self.data.items()
+                    }
+                
                 # 在寫入前對所有動畫列表按照 title 排序
-                sorted_data = self._sort_anime_data(self.data)
+                sorted_data = self._sort_anime_data(data_copy)
                 
-                with open(self.filename, 'w', encoding='utf-8') as f:
+                # 先寫入暫存檔再替換，中途中斷不會留下不完整的資料檔
+                tmp_path = f"{self.filename}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
                     json.dump(sorted_data, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.filename)
             except Exception as e:
                 logger.error(f"保存資料時發生錯誤: {str(e)}")
     
+    def write_snapshot(self, store: SnapshotStore = None) -> str:
+        """
+        將目前的資料寫入版本化快照
+        
+        Args:
+            store: 快照儲存，預設使用配置檔案中的快照目錄
+            
+        Returns:
+            快照的執行識別碼
+        """
+        store = store or SnapshotStore()
+        with self.data_lock:
+            sorted_data = self._sort_anime_data(self.data)
+        return store.write_snapshot(sorted_data)
+    
+    def export_binary_index(self, path: str = None) -> int:
+        """
+        將目前的資料匯出為二進位索引檔
+        
+        Args:
+            path: 索引檔路徑，預設使用配置檔案中的設定
+            
+        Returns:
+            寫入的紀錄數量
+        """
+        path = path or DATA_CONFIG['index_file']
+        with self.data_lock:
+            sorted_data = self._sort_anime_data(self.data)
+        count = write_binary_index(sorted_data, path)
+        logger.info(f"已匯出 {count} 筆紀錄至二進位索引 {path}")
+        return count
+    
     def data_exists(self) -> bool:
         """
         檢查資料檔案是否存在且非空
@@ -6,6 +6,14 @@
 
 使用方法:
     python anime_crawler.py
+    python main.py --worker worker-1   # 分片工作者
+    python main.py --merge-shards      # 合併分片結果
+    python main.py --reset-shards      # 清除上一輪分片狀態，開始新一輪回補
+    python main.py --daemon            # 常駐模式自適應更新
+    python main.py --archive           # 爬取並封存原始網頁
+    python main.py --replay            # 以封存網頁離線重新解析
+    python main.py --media             # 下載封面圖片與縮圖
+    python main.py --media-refresh     # 連同已有圖片的動畫一起條件式重新下載
 
 功能:
 - 自動判斷是否需要完整爬取
@@ -14,12 +22,17 @@
 - 動畫資料按標題排序保存
 """
 
+import argparse
 import logging
 
 from config import DATA_CONFIG, LOGGING_CONFIG
+from coordinator import merge_partial_results, reset_shards
 from data_manager import AnimeDataManager
-from parser import CrawlerEngine
-from utils import calculate_recent_seasons
+from media import MediaFetcher
+from page_archive import PageArchive
+from parser import CrawlerEngine, ReplayEngine
+from scheduler import RefreshScheduler
+from utils import calculate_recent_seasons, calculate_seasons_from_year
 
 # 設定日誌
 logging.basicConfig(
@@ -37,10 +50,15 @@ class AnimeCrawlerApp:
     協調各個模組完成動畫資料的爬取工作
     """
     
-    def __init__(self):
-        """初始化爬蟲應用程式"""
+    def __init__(self, archive: PageArchive = None):
+        """
+        初始化爬蟲應用程式
+
+        Args:
+            archive: 網頁封存，提供時會保存每個抓取到的原始回應
+        """
         self.data_manager = AnimeDataManager()
-        self.crawler_engine = CrawlerEngine()
+        self.crawler_engine = CrawlerEngine(self.data_manager, archive)
     
     def should_perform_full_crawl(self) -> bool:
         """
@@ -67,10 +85,76 @@ class AnimeCrawlerApp:
 
         self.crawler_engine.crawl_specific_seasons(seasons_to_crawl)
     
+    def perform_sharded_crawl(self, worker_id: str) -> None:
+        """
+        以分片工作者身分參與完整爬取
+
+        Args:
+            worker_id: 工作者識別碼
+        """
+        start_year = DATA_CONFIG['start_year']
+        logger.info(f"工作者 {worker_id} 開始分片爬取 {start_year} 年以來的動畫資料...")
+        self.crawler_engine.crawl_sharded(calculate_seasons_from_year(start_year), worker_id)
+
+    def publish_outputs(self) -> None:
+        """等待資料寫入檔案後保存版本化快照並匯出二進位索引，每個會修改資料的模式結束時呼叫"""
+        self.data_manager.flush()
+        self.data_manager.write_snapshot()
+        self.data_manager.export_binary_index()
+
+    def run_daemon(self) -> None:
+        """以常駐模式依各季度變更頻率持續更新資料"""
+        scheduler = RefreshScheduler(self.crawler_engine, on_checked=self.publish_outputs)
+        self.data_manager.start_background_writer()
+        try:
+            scheduler.run_forever()
+        finally:
+            self.data_manager.close()
+
+    def run_replay(self) -> None:
+        """以封存的網頁重新解析並保存資料，不經過網路"""
+        logger.info("開始重播封存的網頁...")
+        replay_engine = ReplayEngine(PageArchive(), self.data_manager)
+        self.data_manager.start_background_writer()
+        try:
+            replayed = replay_engine.replay()
+            self.publish_outputs()
+        finally:
+            self.data_manager.close()
+        logger.info(f"重播完成，共重新解析 {replayed} 個頁面")
+
+    def run_media_stage(self, refresh: bool = False) -> None:
+        """
+        下載現有資料中動畫的封面圖片並產生縮圖
+
+        Args:
+            refresh: 是否連同已有圖片的動畫一起以 ETag / Last-Modified 條件式重新下載
+        """
+        logger.info("開始下載封面圖片...")
+        self.data_manager.start_background_writer()
+        try:
+            MediaFetcher(self.data_manager, parser=self.crawler_engine.parser).run(refresh)
+            self.publish_outputs()
+        finally:
+            self.data_manager.close()
+
+    def merge_shard_results(self) -> None:
+        """合併所有分片工作者的部分結果"""
+        logger.info("開始合併分片爬取結果...")
+        merge_partial_results(self.data_manager)
+        self.publish_outputs()
+
+    def reset_shard_round(self) -> None:
+        """清除上一輪的分片工作單元與部分結果，讓之後的工作者重新爬取"""
+        logger.info("重設分片爬取狀態...")
+        reset_shards()
+
     def run(self) -> None:
         """執行爬蟲主程式"""
         logger.info("開始爬取動畫資料...")
 
+        # 資料保存交由背景執行緒合併寫入，不阻塞爬取
+        self.data_manager.start_background_writer()
         try:
             if self.should_perform_full_crawl():
                 self.perform_full_crawl()
@@ -78,16 +162,51 @@ class AnimeCrawlerApp:
                 self.perform_incremental_update()
 
             logger.info("資料爬取完成")
+            self.publish_outputs()
 
         except Exception as e:
             logger.error(f"爬取過程中發生錯誤: {str(e)}")
             raise
+        finally:
+            self.data_manager.close()
 
 
 def main():
     """主程式入口點"""
-    app = AnimeCrawlerApp()
-    app.run()
+    arg_parser = argparse.ArgumentParser(description="Anime1.me 動畫資料爬蟲")
+    arg_parser.add_argument('--worker', metavar='WORKER_ID',
+                            help="以分片工作者身分執行，與其他工作者共同完成完整爬取")
+    arg_parser.add_argument('--daemon', action='store_true',
+                            help="以常駐模式執行，依各季度變更頻率自動排程更新")
+    arg_parser.add_argument('--archive', action='store_true',
+                            help="將抓取到的原始網頁附加保存至封存檔")
+    arg_parser.add_argument('--replay', action='store_true',
+                            help="以封存檔中的網頁重新解析資料，不發送任何請求")
+    arg_parser.add_argument('--media', action='store_true',
+                            help="下載現有資料中動畫的封面圖片並產生縮圖")
+    arg_parser.add_argument('--media-refresh', action='store_true',
+                            help="同 --media，並連同已有圖片的動畫一起條件式重新下載")
+    arg_parser.add_argument('--merge-shards', action='store_true',
+                            help="合併分片工作者的部分結果至資料檔案")
+    arg_parser.add_argument('--reset-shards', action='store_true',
+                            help="清除已完成的分片工作單元與部分結果，開始新一輪回補")
+    args = arg_parser.parse_args()
+
+    app = AnimeCrawlerApp(PageArchive() if args.archive else None)
+    if args.replay:
+        app.run_replay()
+    elif args.worker:
+        app.perform_sharded_crawl(args.worker)
+    elif args.daemon:
+        app.run_daemon()
+    elif args.media or args.media_refresh:
+        app.run_media_stage(refresh=args.media_refresh)
+    elif args.merge_shards:
+        app.merge_shard_results()
+    elif args.reset_shards:
+        app.reset_shard_round()
+    else:
+        app.run()
 
 
 if __name__ == "__main__":
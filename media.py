@@ -0,0 +1,402 @@
+"""
+動畫圖片下載模組
+
+為每部動畫取得封面圖片網址（分類頁面透過解析器的抓取層分批並行抓取），
+在爬取速率限制下並行下載，以內容雜湊去重保存，
+並以行程池產生限制大小的縮圖，最後將圖片路徑記錄在資料中。
+"""
+
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup
+
+from config import MEDIA_CONFIG, REQUEST_CONFIG, SITE_CONFIG
+from data_manager import AnimeDataManager
+from parser import AnimeParser
+from utils import RateLimiter
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow 為選用套件，未安裝時只下載原圖不產生縮圖
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+
+def extract_image_url(html: str, page_url: str) -> Optional[str]:
+    """
+    從動畫頁面中找出封面圖片網址
+
+    依序嘗試 og:image、twitter:image 與文章內第一張圖片
+
+    Args:
+        html: 網頁 HTML 內容
+        page_url: 網頁 URL，用於解析相對路徑
+
+    Returns:
+        圖片的絕對網址，如果找不到則返回 None
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+
+    for attrs in ({'property': 'og:image'}, {'name': 'twitter:image'}):
+        meta = soup.find('meta', attrs=attrs)
+        if meta and meta.get('content'):
+            return urljoin(page_url, meta['content'])
+
+    container = soup.find('article') or soup
+    img = container.find('img', src=True)
+    if img:
+        return urljoin(page_url, img['src'])
+    return None
+
+
+def make_thumbnail(source_path: str, thumbnail_path: str, max_size: Tuple[int, int]) -> bool:
+    """
+    產生等比例縮小的 JPEG 縮圖（在行程池中執行）
+
+    Args:
+        source_path: 原圖路徑
+        thumbnail_path: 縮圖輸出路徑
+        max_size: 縮圖最大寬高
+
+    Returns:
+        True 如果產生成功，否則 False
+    """
+    try:
+        os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
+        with Image.open(source_path) as image:
+            image.thumbnail(max_size)
+            tmp_path = f"{thumbnail_path}.tmp"
+            image.convert('RGB').save(tmp_path, 'JPEG', quality=85)
+        os.replace(tmp_path, thumbnail_path)
+        return True
+    except Exception as e:
+        logger.error(f"產生縮圖 {source_path} 時發生錯誤: {str(e)}")
+        return False
+
+
+class MediaStore:
+    """
+    內容定址圖片儲存
+
+    原圖以 SHA-256 命名，相同內容只保存一份；索引檔記錄每個網址的
+    ETag 與 Last-Modified，供條件式重新下載使用
+    """
+
+    def __init__(self, root: str = None):
+        """
+        初始化圖片儲存
+
+        Args:
+            root: 圖片根目錄，預設使用配置檔案中的設定
+        """
+        self.root = root or MEDIA_CONFIG['root']
+        self.index_path = os.path.join(self.root, 'index.json')
+        self.lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self) -> Dict[str, Any]:
+        """
+        載入網址索引
+
+        Returns:
+            以圖片網址為鍵的索引字典
+        """
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            logger.warning(f"無法載入圖片索引: {str(e)}")
+            return {}
+
+    def save_index(self) -> None:
+        """將網址索引保存到檔案"""
+        with self.lock:
+            try:
+                with open(self.index_path, 'w', encoding='utf-8') as f:
+                    json.dump(self.index, f, ensure_ascii=False, indent=2, sort_keys=True)
+            except Exception as e:
+                logger.error(f"保存圖片索引時發生錯誤: {str(e)}")
+
+    def original_path(self, digest: str, ext: str) -> str:
+        """取得原圖路徑，以雜湊前兩碼分目錄"""
+        return os.path.join(self.root, 'originals', digest[:2], f"{digest}{ext}")
+
+    def thumbnail_path(self, digest: str) -> str:
+        """取得縮圖路徑"""
+        return os.path.join(self.root, 'thumbs', digest[:2], f"{digest}.jpg")
+
+    def get_cached(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        取得網址的索引項目，原圖檔案不存在時視為未快取
+
+        Args:
+            url: 圖片網址
+
+        Returns:
+            索引項目，如果沒有快取則返回 None
+        """
+        with self.lock:
+            entry = self.index.get(url)
+        if entry and os.path.exists(self.original_path(entry['sha256'], entry['ext'])):
+            return entry
+        return None
+
+    def store(self, url: str, content: bytes, content_type: str = None,
+              etag: str = None, last_modified: str = None) -> Dict[str, Any]:
+        """
+        保存下載的圖片，內容相同時不重複寫入
+
+        Args:
+            url: 圖片網址
+            content: 圖片內容
+            content_type: 回應的 Content-Type
+            etag: 回應的 ETag
+            last_modified: 回應的 Last-Modified
+
+        Returns:
+            索引項目
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        ext = (mimetypes.guess_extension((content_type or '').split(';')[0].strip())
+               or os.path.splitext(urlparse(url).path)[1].lower()
+               or '.img')
+
+        path = self.original_path(digest, ext)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.tmp.{threading.get_ident()}"
+            with open(tmp_path, 'wb') as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+
+        entry = {'sha256': digest, 'ext': ext, 'etag': etag, 'last_modified': last_modified}
+        with self.lock:
+            self.index[url] = entry
+        return entry
+
+
+class MediaFetcher:
+    """
+    圖片下載階段
+
+    協調封面網址解析、並行下載、縮圖產生與資料更新
+    """
+
+    def __init__(self, data_manager: AnimeDataManager, store: MediaStore = None,
+                 download_workers: int = None, thumbnail_workers: int = None,
+                 parser: AnimeParser = None):
+        """
+        初始化圖片下載階段
+
+        Args:
+            data_manager: 要記錄圖片路徑的資料管理器
+            store: 圖片儲存，預設使用配置檔案中的圖片目錄
+            download_workers: 同時下載的執行緒數量，預設使用配置檔案中的設定
+            thumbnail_workers: 產生縮圖的行程數量，預設使用配置檔案中的設定
+            parser: 用來抓取分類頁面的解析器，圖片下載也共用其抓取層，預設建立新的實例
+        """
+        self.data_manager = data_manager
+        self.store = store or MediaStore()
+        self.download_workers = download_workers or MEDIA_CONFIG['download_workers']
+        self.thumbnail_workers = thumbnail_workers or MEDIA_CONFIG['thumbnail_workers']
+        self.headers = REQUEST_CONFIG['headers']
+        self.parser = parser or AnimeParser()
+        self.transport = self.parser.transport
+        self.rate_limiter = RateLimiter(MEDIA_CONFIG['min_request_interval'])
+
+    def _get(self, url: str, headers: Dict[str, str] = None):
+        """在速率限制下透過抓取層發送 GET 請求"""
+        self.rate_limiter.wait()
+        return self.transport.get(url, {**self.headers, **(headers or {})})
+
+    def _resolve_image_urls(self, cat_ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        分批以解析器的 fetch_pages 並行抓取動畫分類頁面並解析封面圖片網址
+
+        Args:
+            cat_ids: 沒有已知圖片網址的動畫 cat_id 列表
+
+        Returns:
+            cat_id 對應圖片網址的字典，抓取失敗或找不到圖片時為 None
+        """
+        resolved = {}
+        batch_size = MEDIA_CONFIG['page_batch_size']
+        for start in range(0, len(cat_ids), batch_size):
+            batch = cat_ids[start:start + batch_size]
+            page_urls = [f"{SITE_CONFIG['base_url']}/?cat={cat_id}" for cat_id in batch]
+            try:
+                responses = self.parser.fetch_pages(page_urls)
+            except Exception as e:
+                logger.error(f"抓取動畫分類頁面時發生錯誤: {str(e)}")
+                resolved.update(dict.fromkeys(batch))
+                continue
+
+            for cat_id, page_url, response in zip(batch, page_urls, responses):
+                try:
+                    response.raise_for_status()
+                    resolved[cat_id] = extract_image_url(response.text, page_url)
+                except Exception as e:
+                    logger.error(f"解析 cat_id {cat_id} 的分類頁面時發生錯誤: {str(e)}")
+                    resolved[cat_id] = None
+        return resolved
+
+    def _download(self, url: str) -> Dict[str, Any]:
+        """
+        條件式下載圖片，伺服器回應 304 時沿用快取
+
+        Args:
+            url: 圖片網址
+
+        Returns:
+            索引項目
+        """
+        cached = self.store.get_cached(url)
+        conditional_headers = {}
+        if cached:
+            if cached.get('etag'):
+                conditional_headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                conditional_headers['If-Modified-Since'] = cached['last_modified']
+
+        response = self._get(url, conditional_headers)
+        if response.status_code == 304 and cached:
+            return cached
+        response.raise_for_status()
+
+        return self.store.store(url, response.content,
+                                response.headers.get('Content-Type'),
+                                response.headers.get('ETag'),
+                                response.headers.get('Last-Modified'))
+
+    def _process(self, cat_id: str, image_url: Optional[str]) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        """
+        下載單一動畫的封面圖片（在下載執行緒中執行）
+
+        Returns:
+            (cat_id, 圖片網址, 索引項目)，失敗時返回 None
+        """
+        try:
+            if not image_url:
+                logger.info(f"cat_id {cat_id} 沒有找到封面圖片")
+                return None
+            return cat_id, image_url, self._download(image_url)
+        except Exception as e:
+            logger.error(f"下載 cat_id {cat_id} 的封面圖片時發生錯誤: {str(e)}")
+            return None
+
+    def _collect_targets(self, refresh: bool) -> Dict[str, Optional[str]]:
+        """
+        收集需要處理的動畫
+
+        Args:
+            refresh: 是否連同已有圖片的動畫一起條件式重新下載
+
+        Returns:
+            cat_id 對應已知圖片網址（可能為 None）的字典
+        """
+        targets = {}
+        for year_data in self.data_manager.get_data().values():
+            for anime_list in year_data.values():
+                for anime in anime_list:
+                    cat_id = anime.get('cat_id')
+                    if not cat_id or not self._needs_download(anime, refresh):
+                        continue
+                    if not targets.get(cat_id):
+                        targets[cat_id] = anime.get('image_url')
+        return targets
+
+    @staticmethod
+    def _needs_download(anime: Dict[str, Any], refresh: bool) -> bool:
+        """
+        判斷動畫是否需要下載封面圖片
+
+        Args:
+            anime: 動畫資訊
+            refresh: 是否連同已有圖片的動畫一起條件式重新下載
+
+        Returns:
+            True 如果沒有圖片、要求重新下載，或保存的圖片來自與目前 image_url 不同的網址
+        """
+        if refresh or not anime.get('image'):
+            return True
+        # 重新爬取帶來新的圖片網址時，已保存的圖片已經過期
+        image_url = anime.get('image_url')
+        return bool(image_url) and anime.get('image_source') != image_url
+
+    def _make_thumbnails(self, entries: List[Dict[str, Any]]) -> None:
+        """以行程池為尚未有縮圖的原圖產生縮圖"""
+        if Image is None:
+            logger.warning("未安裝 Pillow，略過縮圖產生")
+            return
+
+        jobs = {}
+        for entry in entries:
+            thumbnail_path = self.store.thumbnail_path(entry['sha256'])
+            if not os.path.exists(thumbnail_path):
+                source_path = self.store.original_path(entry['sha256'], entry['ext'])
+                jobs[thumbnail_path] = source_path
+        if not jobs:
+            return
+
+        max_size = tuple(MEDIA_CONFIG['thumbnail_size'])
+        with ProcessPoolExecutor(max_workers=self.thumbnail_workers) as pool:
+            results = list(pool.map(make_thumbnail, jobs.values(), jobs.keys(),
+                                    [max_size] * len(jobs)))
+        logger.info(f"產生了 {sum(results)}/{len(jobs)} 張縮圖")
+
+    def _relative_path(self, path: str) -> str:
+        """取得相對於資料檔案目錄的路徑，供前端直接引用"""
+        data_dir = os.path.dirname(os.path.abspath(self.data_manager.filename))
+        return Path(os.path.relpath(os.path.abspath(path), data_dir)).as_posix()
+
+    def run(self, refresh: bool = False) -> Dict[str, int]:
+        """
+        執行圖片下載階段
+
+        Args:
+            refresh: 是否連同已有圖片的動畫一起條件式重新下載
+
+        Returns:
+            包含目標數量、下載成功數量與不同圖片數量的統計
+        """
+        targets = self._collect_targets(refresh)
+        logger.info(f"準備處理 {len(targets)} 部動畫的封面圖片...")
+
+        missing = [cat_id for cat_id, image_url in targets.items() if not image_url]
+        if missing:
+            targets.update(self._resolve_image_urls(missing))
+
+        with ThreadPoolExecutor(max_workers=self.download_workers) as pool:
+            results = [r for r in pool.map(self._process, targets.keys(), targets.values()) if r]
+        self.store.save_index()
+
+        unique_entries = list({entry['sha256']: entry for _, _, entry in results}.values())
+        self._make_thumbnails(unique_entries)
+
+        for cat_id, image_url, entry in results:
+            thumbnail_path = self.store.thumbnail_path(entry['sha256'])
+            fields = {
+                'image_url': image_url,
+                'image_source': image_url,
+                'image': self._relative_path(self.store.original_path(entry['sha256'], entry['ext'])),
+                # 沒有縮圖時移除舊圖片留下的縮圖欄位
+                'thumbnail': (self._relative_path(thumbnail_path)
+                              if os.path.exists(thumbnail_path) else None)
+            }
+            self.data_manager.update_anime_fields(cat_id, fields)
+
+        stats = {'targets': len(targets), 'downloaded': len(results), 'unique': len(unique_entries)}
+        logger.info(f"圖片下載完成: {stats['downloaded']}/{stats['targets']} 部動畫，"
+                    f"{stats['unique']} 張不同圖片")
+        return stats
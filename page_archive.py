@@ -0,0 +1,200 @@
+"""
+網頁封存模組
+
+以類似 WARC 的方式將抓取到的原始回應附加寫入封存檔，並維護位移索引，
+供離線重新解析與回歸測試使用。
+"""
+
+import contextlib
+import gzip
+import json
+import os
+import threading
+import time
+import logging
+from typing import Dict, Any, Iterator, List, Optional
+
+from config import ARCHIVE_CONFIG
+
+try:
+    import fcntl
+except ImportError:  # Windows 沒有 fcntl，改用 msvcrt
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+logger = logging.getLogger(__name__)
+
+
+@contextlib.contextmanager
+def _exclusive_file_lock(f):
+    """
+    在區塊執行期間對已開啟的檔案持有跨行程的獨占鎖
+
+    POSIX 使用 flock，Windows 使用 msvcrt.locking 鎖定第一個位元組；
+    兩者皆不可用時只依靠呼叫端的執行緒鎖
+
+    Args:
+        f: 已開啟的檔案物件
+    """
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        # msvcrt.locking 從目前位置鎖定，附加模式的寫入仍會寫到檔案結尾
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        yield
+
+
+class PageArchive:
+    """
+    只可附加的網頁封存
+
+    每筆紀錄是一個獨立的 gzip 區段（JSON 標頭行 + 原始內容），
+    索引檔每行記錄一筆紀錄的 URL、位移與長度
+    """
+
+    def __init__(self, path: str = None):
+        """
+        初始化封存
+
+        Args:
+            path: 封存檔路徑，預設使用配置檔案中的設定；索引檔為同名加上 .idx
+        """
+        self.path = path or ARCHIVE_CONFIG['path']
+        self.index_path = f"{self.path}.idx"
+        self.lock = threading.Lock()
+
+        dir_name = os.path.dirname(self.path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+
+        self.index = self._load_index()
+
+    def _load_index(self) -> List[Dict[str, Any]]:
+        """
+        載入位移索引
+
+        Returns:
+            依寫入順序排列的索引項目列表
+        """
+        entries = []
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        entries.append(json.loads(line))
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError as e:
+            # 中斷寫入可能留下不完整的最後一行，之前的項目仍然有效
+            logger.warning(f"封存索引格式錯誤，只載入前 {len(entries)} 筆: {str(e)}")
+        return entries
+
+    def record(self, url: str, status: int, headers: Dict[str, str], body: bytes,
+               encoding: Optional[str] = None) -> Dict[str, Any]:
+        """
+        附加一筆回應紀錄
+
+        Args:
+            url: 請求 URL
+            status: HTTP 狀態碼
+            headers: 回應標頭
+            body: 原始回應內容
+            encoding: 回應內容的文字編碼
+
+        Returns:
+            新增的索引項目
+        """
+        fetched_at = time.time()
+        meta = {
+            'url': url,
+            'status': status,
+            'headers': dict(headers),
+            'encoding': encoding,
+            'fetched_at': fetched_at
+        }
+        record = json.dumps(meta, ensure_ascii=False).encode('utf-8') + b'\n' + body
+        compressed = gzip.compress(record)
+
+        # 執行緒鎖保護同一行程，檔案鎖保護多個 --worker 行程共用的封存檔，
+        # 讓紀錄的位移與寫入位置、以及索引行的順序保持一致
+        with self.lock, open(self.path, 'ab') as archive_file, \
+                _exclusive_file_lock(archive_file):
+            offset = archive_file.seek(0, os.SEEK_END)
+            archive_file.write(compressed)
+            archive_file.flush()
+
+            entry = {
+                'url': url,
+                'status': status,
+                'fetched_at': fetched_at,
+                'offset': offset,
+                'length': len(compressed)
+            }
+            with open(self.index_path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.index.append(entry)
+
+        return entry
+
+    def read(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        依索引項目讀取一筆紀錄
+
+        Args:
+            entry: 索引項目
+
+        Returns:
+            紀錄字典，包含標頭欄位與 body（bytes）
+        """
+        with open(self.path, 'rb') as f:
+            f.seek(entry['offset'])
+            compressed = f.read(entry['length'])
+
+        header, body = gzip.decompress(compressed).split(b'\n', 1)
+        record = json.loads(header.decode('utf-8'))
+        record['body'] = body
+        return record
+
+    def latest_entries(self, status: int = 200) -> List[Dict[str, Any]]:
+        """
+        取得每個 URL 最新一筆指定狀態的索引項目
+
+        Args:
+            status: 只保留此 HTTP 狀態碼的紀錄
+
+        Returns:
+            依 URL 首次出現順序排列的索引項目列表
+        """
+        latest = {}
+        for entry in self.index:
+            if entry['status'] == status:
+                latest[entry['url']] = entry
+        return list(latest.values())
+
+    def iter_records(self, status: int = 200) -> Iterator[Dict[str, Any]]:
+        """
+        逐筆讀取每個 URL 最新一筆指定狀態的紀錄
+
+        Args:
+            status: 只保留此 HTTP 狀態碼的紀錄
+
+        Yields:
+            紀錄字典
+        """
+        for entry in self.latest_entries(status):
+            yield self.read(entry)
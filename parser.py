@@ -2,14 +2,18 @@
 網頁解析模組
 """
 
-import requests
+import time
+from urllib.parse import urljoin
 from bs4 import BeautifulSoup
 import logging
 from typing import List, Dict, Optional
 
-from config import REQUEST_CONFIG, SITE_CONFIG
+from config import REQUEST_CONFIG, SITE_CONFIG, SHARD_CONFIG
 from utils import retry_on_exception, add_random_delay, extract_cat_id_from_href
 from data_manager import AnimeDataManager
+from coordinator import LeaseCoordinator, make_season_unit, get_partial_filename
+from page_archive import PageArchive
+from transport import Transport, create_transport
 
 logger = logging.getLogger(__name__)
 
@@ -21,10 +25,18 @@ class AnimeParser:
     負責從網頁中解析動畫資訊
     """
     
-    def __init__(self):
-        """初始化解析器"""
+    def __init__(self, archive: PageArchive = None, transport: Transport = None):
+        """
+        初始化解析器
+        
+        Args:
+            archive: 網頁封存，提供時會保存每個抓取到的原始回應
+            transport: 抓取層，預設依配置檔案建立（連續請求重複使用同一條連線）
+        """
         self.headers = REQUEST_CONFIG['headers']
         self.skip_titles = SITE_CONFIG['skip_titles']
+        self.archive = archive
+        self.transport = transport or create_transport()
     
     def _extract_anime_from_link(self, link) -> Optional[Dict[str, str]]:
         """
@@ -45,10 +57,17 @@ class AnimeParser:
         href = link.get('href', '')
         cat_id = extract_cat_id_from_href(href)
         
-        return {
+        anime_info = {
             'title': title,
             'cat_id': cat_id
         }
+        
+        # 連結中附帶的封面圖片
+        img = link.find('img')
+        if img and img.get('src'):
+            anime_info['image_url'] = urljoin(SITE_CONFIG['base_url'], img['src'])
+        
+        return anime_info
     
     def _extract_anime_from_table(self, table) -> List[Dict[str, str]]:
         """
@@ -95,11 +114,50 @@ class AnimeParser:
         add_random_delay(delay_range[0], delay_range[1])
         
         # 發送請求
-        response = requests.get(url, headers=self.headers)
+        response = self.transport.get(url, headers=self.headers)
+        self._archive_response(url, response)
         response.raise_for_status()
         
+        return self.parse_html(response.text, url, year, season, data_manager)
+    
+    def _archive_response(self, url: str, response) -> None:
+        """有設定網頁封存時保存原始回應"""
+        if self.archive is not None:
+            self.archive.record(url, response.status_code, response.headers,
+                                response.content, response.encoding)
+    
+    def fetch_pages(self, urls: List[str]) -> list:
+        """
+        透過抓取層並行抓取多個頁面（HTTP/2 傳輸會在同一條連線上多工）
+        
+        Args:
+            urls: 目標 URL 列表
+            
+        Returns:
+            與 urls 順序相同的回應物件列表
+        """
+        responses = self.transport.get_many(urls, headers=self.headers)
+        for url, response in zip(urls, responses):
+            self._archive_response(url, response)
+        return responses
+    
+    def parse_html(self, html: str, url: str, year: int, season: str,
+                   data_manager: AnimeDataManager) -> List[Dict[str, str]]:
+        """
+        解析已取得的網頁內容並保存動畫資訊
+        
+        Args:
+            html: 網頁 HTML 內容
+            url: 網頁 URL（用於日誌）
+            year: 年份
+            season: 季節（中文）
+            data_manager: 資料管理器實例
+            
+        Returns:
+            解析出的動畫資訊列表
+        """
         # 解析 HTML
-        soup = BeautifulSoup(response.text, 'html.parser')
+        soup = BeautifulSoup(html, 'html.parser')
         table = soup.find('table')
         
         if not table:
@@ -127,10 +185,41 @@ class CrawlerEngine:
     協調解析器和資料管理器進行批量爬取
     """
     
-    def __init__(self):
-        """初始化爬蟲引擎"""
-        self.parser = AnimeParser()
-        self.data_manager = AnimeDataManager()
+    def __init__(self, data_manager: AnimeDataManager = None, archive: PageArchive = None):
+        """
+        初始化爬蟲引擎
+        
+        Args:
+            data_manager: 資料管理器，預設建立新的實例
+            archive: 網頁封存，提供時會保存每個抓取到的原始回應
+        """
+        self.parser = AnimeParser(archive)
+        self.data_manager = data_manager or AnimeDataManager()
+    
+    def crawl_season(self, year: int, season: str,
+                     data_manager: AnimeDataManager = None) -> Optional[List[Dict[str, str]]]:
+        """
+        爬取單一季度的資料
+        
+        Args:
+            year: 年份
+            season: 季節（中文）
+            data_manager: 保存結果的資料管理器，預設使用引擎的資料管理器
+            
+        Returns:
+            解析出的動畫資訊列表，如果爬取失敗則返回 None
+        """
+        from utils import get_encoded_url
+        
+        logger.info(f"正在爬取 {year} 年 {season}季 的動畫...")
+        url = get_encoded_url(year, season)
+        
+        try:
+            return self.parser.parse_anime_table(url, year, season,
+                                                 data_manager or self.data_manager)
+        except Exception as e:
+            logger.error(f"爬取 {year} 年 {season}季 時發生錯誤: {str(e)}")
+            return None
     
     def crawl_specific_seasons(self, seasons_to_crawl: List[tuple]) -> None:
         """
@@ -139,16 +228,8 @@ class CrawlerEngine:
         Args:
             seasons_to_crawl: (年份, 季節) 的列表
         """
-        from utils import get_encoded_url
-        
         for year, season in seasons_to_crawl:
-            logger.info(f"正在爬取 {year} 年 {season}季 的動畫...")
-            url = get_encoded_url(year, season)
-            
-            try:
-                self.parser.parse_anime_table(url, year, season, self.data_manager)
-            except Exception as e:
-                logger.error(f"爬取 {year} 年 {season}季 時發生錯誤: {str(e)}")
+            if self.crawl_season(year, season) is None:
                 continue
             
             # 在季度之間添加延遲
@@ -162,32 +243,122 @@ class CrawlerEngine:
         Args:
             start_year: 開始年份
         """
-        from datetime import datetime
-        from utils import should_skip_season, get_encoded_url
-        from config import SEASON_MAPPING
-        
-        current_date = datetime.now()
-        current_year = current_date.year
-        current_month = current_date.month
-        
-        seasons = SEASON_MAPPING['order']
-        years_to_crawl = range(start_year, current_year + 1)
-        
-        for year in years_to_crawl:
-            for season in seasons:
-                # 檢查是否應該跳過當前季節
-                if should_skip_season(year, season, current_year, current_month):
-                    continue
-                
-                logger.info(f"正在爬取 {year} 年 {season}季 的動畫...")
-                url = get_encoded_url(year, season)
-                
-                try:
-                    self.parser.parse_anime_table(url, year, season, self.data_manager)
-                except Exception as e:
-                    logger.error(f"爬取 {year} 年 {season}季 時發生錯誤: {str(e)}")
-                    continue
-                
-                # 在季度之間添加延遲
-                delay_range = REQUEST_CONFIG['season_delay_range']
-                add_random_delay(delay_range[0], delay_range[1])
\ No newline at end of file
+        from utils import calculate_seasons_from_year
+        
+        self.crawl_specific_seasons(calculate_seasons_from_year(start_year))
+    
+    def crawl_sharded(self, seasons_to_crawl: List[tuple], worker_id: str,
+                      coordinator: LeaseCoordinator = None,
+                      partial_dir: str = None) -> int:
+        """
+        以租約方式與其他工作者分工爬取指定的季度
+        
+        每個工作者將結果寫入自己的部分結果檔案，全部完成後
+        再以 merge_partial_results 合併至主資料檔案。
+        
+        Args:
+            seasons_to_crawl: (年份, 季節) 的列表
+            worker_id: 工作者識別碼
+            coordinator: 租約協調器，預設使用配置檔案中的協調資料庫
+            partial_dir: 部分結果目錄，預設使用配置檔案中的設定
+            
+        Returns:
+            此工作者完成的工作單元數量
+        """
+        coordinator = coordinator or LeaseCoordinator()
+        coordinator.register_units([make_season_unit(year, season)
+                                    for year, season in seasons_to_crawl])
+        partial_manager = AnimeDataManager(get_partial_filename(worker_id, partial_dir))
+        # 部分結果同樣交由背景執行緒合併寫入，不阻塞爬取
+        partial_manager.start_background_writer()
+        try:
+            completed = self._crawl_claimed_units(coordinator, worker_id, partial_manager)
+        finally:
+            partial_manager.close()
+        
+        logger.info(f"工作者 {worker_id} 完成 {completed} 個工作單元")
+        return completed
+    
+    def _crawl_claimed_units(self, coordinator: LeaseCoordinator, worker_id: str,
+                             partial_manager: AnimeDataManager) -> int:
+        """
+        持續領取並爬取工作單元，直到所有工作單元都已完成
+        
+        Returns:
+            此工作者完成的工作單元數量
+        """
+        completed = 0
+        while True:
+            unit = coordinator.claim(worker_id)
+            if unit is None:
+                if coordinator.remaining() == 0:
+                    break
+                # 其他工作者仍持有租約，等待完成或逾期後收回
+                time.sleep(SHARD_CONFIG['poll_interval'])
+                continue
+            
+            payload = unit['payload']
+            with coordinator.keep_alive(unit['unit_id'], worker_id):
+                anime_list = self.crawl_season(payload['year'], payload['season'], partial_manager)
+            
+            if anime_list is not None:
+                # 季度內的多次保存合併為一次寫入，寫入完成後才標記完成，
+                # 避免工作者中斷時已完成的單元沒有部分結果
+                partial_manager.flush()
+                if coordinator.complete(unit['unit_id'], worker_id):
+                    completed += 1
+                else:
+                    logger.warning(f"租約已失效，工作單元 {unit['unit_id']} 由其他工作者處理")
+            else:
+                coordinator.fail(unit['unit_id'], worker_id)
+            
+            # 在季度之間添加延遲
+            delay_range = REQUEST_CONFIG['season_delay_range']
+            add_random_delay(delay_range[0], delay_range[1])
+        
+        return completed
+
+
+class ReplayEngine:
+    """
+    重播引擎
+    
+    將封存的網頁重新送入解析與保存流程，不經過網路也不延遲
+    """
+    
+    def __init__(self, archive: PageArchive = None, data_manager: AnimeDataManager = None):
+        """
+        初始化重播引擎
+        
+        Args:
+            archive: 網頁封存，預設使用配置檔案中的封存檔
+            data_manager: 資料管理器，預設建立新的實例
+        """
+        self.archive = archive or PageArchive()
+        self.parser = AnimeParser()
+        self.data_manager = data_manager or AnimeDataManager()
+    
+    def replay(self) -> int:
+        """
+        重新解析封存中每個季度頁面最新的成功回應
+        
+        Returns:
+            重新解析的頁面數量
+        """
+        from utils import parse_season_from_url
+        
+        replayed = 0
+        for record in self.archive.iter_records():
+            season_info = parse_season_from_url(record['url'])
+            if season_info is None:
+                logger.warning(f"無法從 URL 判斷季度，略過: {record['url']}")
+                continue
+            
+            year, season = season_info
+            html = record['body'].decode(record.get('encoding') or 'utf-8', errors='replace')
+            anime_list = self.parser.parse_html(html, record['url'], year, season,
+                                                self.data_manager)
+            logger.info(f"重播 {year} 年 {season}季: {len(anime_list)} 部動畫")
+            replayed += 1
+        
+        return replayed
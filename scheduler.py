@@ -0,0 +1,263 @@
+"""
+自適應更新排程模組
+
+依各季度實際觀察到的變更頻率決定下次檢查時間，取代固定更新最近三季的規則。
+"""
+
+import hashlib
+import json
+import os
+import time
+import logging
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from config import DATA_CONFIG, REQUEST_CONFIG, SCHEDULER_CONFIG
+from parser import CrawlerEngine
+from utils import add_random_delay, calculate_seasons_from_year, get_seasons_ago
+
+logger = logging.getLogger(__name__)
+
+
+def fingerprint_anime_list(anime_list: List[Dict[str, str]]) -> str:
+    """
+    計算動畫列表的指紋，與列表順序無關
+
+    Args:
+        anime_list: 動畫資訊列表
+
+    Returns:
+        SHA-1 十六進位字串
+    """
+    normalized = sorted(
+        (anime.get('cat_id') or '', anime.get('title', '')) for anime in anime_list
+    )
+    payload = json.dumps(normalized, ensure_ascii=False)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class RefreshScheduler:
+    """
+    自適應更新排程器
+
+    為每個季度保存最近的變更時間，依觀察到的變更週期決定檢查間隔，
+    並依季度新舊以指數方式提高最短間隔
+    """
+
+    def __init__(self, crawler_engine: CrawlerEngine = None, state_file: str = None,
+                 on_checked: Callable[[], None] = None):
+        """
+        初始化排程器
+
+        Args:
+            crawler_engine: 爬蟲引擎，預設建立新的實例
+            state_file: 排程狀態檔案路徑，預設使用配置檔案中的設定
+            on_checked: 每輪有季度完成檢查後呼叫，用於保存快照等後續處理
+        """
+        self.crawler_engine = crawler_engine or CrawlerEngine()
+        self.on_checked = on_checked
+        self.state_file = state_file or SCHEDULER_CONFIG['state_file']
+        self.state = self._load_state()
+        # 爬取失敗的季度暫緩到此時間再重試（不寫入狀態檔案）
+        self.retry_after: Dict[str, float] = {}
+
+    def _load_state(self) -> Dict[str, Any]:
+        """
+        載入排程狀態
+
+        Returns:
+            以 "年份:季節" 為鍵的狀態字典
+        """
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            logger.warning(f"無法載入排程狀態: {str(e)}")
+            return {}
+
+    def _save_state(self) -> None:
+        """將排程狀態保存到檔案"""
+        try:
+            dir_name = os.path.dirname(self.state_file)
+            if dir_name:
+                os.makedirs(dir_name, exist_ok=True)
+            with open(self.state_file, 'w', encoding='utf-8') as f:
+                json.dump(self.state, f, ensure_ascii=False, indent=2)
+        except Exception as e:
+            logger.error(f"保存排程狀態時發生錯誤: {str(e)}")
+
+    @staticmethod
+    def _season_key(year: int, season: str) -> str:
+        """取得季度在狀態字典中的鍵"""
+        return f"{year}:{season}"
+
+    def _min_interval_for(self, year: int, season: str) -> float:
+        """
+        計算季度的最短檢查間隔，每舊一季以 age_decay 倍數放大
+
+        Args:
+            year: 年份
+            season: 季節（中文）
+
+        Returns:
+            最短檢查間隔（秒）
+        """
+        age = max(get_seasons_ago(year, season), 0)
+        interval = SCHEDULER_CONFIG['min_interval'] * SCHEDULER_CONFIG['age_decay'] ** age
+        return min(interval, SCHEDULER_CONFIG['max_interval'])
+
+    def next_check_time(self, year: int, season: str) -> float:
+        """
+        取得季度的下次檢查時間
+
+        Args:
+            year: 年份
+            season: 季節（中文）
+
+        Returns:
+            Unix 時間戳記，從未檢查過的季度返回 0
+        """
+        key = self._season_key(year, season)
+        entry = self.state.get(key)
+        next_check = entry['next_check'] if entry else 0
+        return max(next_check, self.retry_after.get(key, 0))
+
+    def due_seasons(self, now: float = None) -> List[Tuple[int, str]]:
+        """
+        取得已到檢查時間的季度，較新的季度優先
+
+        Args:
+            now: 目前時間戳記，預設為現在
+
+        Returns:
+            (年份, 季節) 的列表
+        """
+        now = now if now is not None else time.time()
+        seasons = calculate_seasons_from_year(DATA_CONFIG['start_year'])
+        due = [s for s in seasons if self.next_check_time(*s) <= now]
+        return list(reversed(due))
+
+    @staticmethod
+    def _estimate_change_period(entry: Dict[str, Any], now: float) -> float:
+        """
+        由變更紀錄估計季度平均多久變更一次
+
+        取最近幾次變更之間的平均間隔；如果距離上次變更已經超過這個間隔，
+        代表變更頻率正在下降，改用距離上次變更（或首次檢查）的時間
+
+        Args:
+            entry: 季度狀態
+            now: 目前時間戳記
+
+        Returns:
+            估計的變更週期（秒），沒有任何觀察時為 0
+        """
+        history = entry['history']
+        last_change = history[-1] if history else entry.get('first_checked', now)
+        period = now - last_change
+        if len(history) >= 2:
+            mean_gap = (history[-1] - history[0]) / (len(history) - 1)
+            period = max(period, mean_gap)
+        return period
+
+    def record_check(self, year: int, season: str, anime_list: List[Dict[str, str]],
+                     now: float = None) -> Dict[str, Any]:
+        """
+        記錄一次檢查結果並計算下次檢查時間
+
+        Args:
+            year: 年份
+            season: 季節（中文）
+            anime_list: 本次解析出的動畫資訊列表
+            now: 目前時間戳記，預設為現在
+
+        Returns:
+            更新後的季度狀態
+        """
+        now = now if now is not None else time.time()
+        key = self._season_key(year, season)
+        min_interval = self._min_interval_for(year, season)
+        fingerprint = fingerprint_anime_list(anime_list)
+
+        entry = self.state.get(key)
+        if entry is None:
+            entry = {'checks': 0, 'changes': 0, 'history': [], 'first_checked': now}
+            changed = False
+        else:
+            changed = entry['fingerprint'] != fingerprint
+
+        if changed:
+            entry['changes'] += 1
+            entry['history'] = (entry['history'] + [now])[-SCHEDULER_CONFIG['history_size']:]
+
+        interval = self._estimate_change_period(entry, now) / SCHEDULER_CONFIG['checks_per_change']
+        entry['interval'] = min(max(interval, min_interval), SCHEDULER_CONFIG['max_interval'])
+        entry['checks'] += 1
+        entry['fingerprint'] = fingerprint
+        entry['last_checked'] = now
+        entry['next_check'] = now + entry['interval']
+        self.state[key] = entry
+
+        logger.info(f"{year} 年 {season}季 {'有' if changed else '無'}變更，"
+                    f"{entry['interval'] / 3600:.1f} 小時後再次檢查")
+        return entry
+
+    def tick(self, now: float = None) -> int:
+        """
+        檢查所有已到期的季度
+
+        Args:
+            now: 目前時間戳記，預設為現在
+
+        Returns:
+            本次檢查的季度數量
+        """
+        checked = 0
+        for year, season in self.due_seasons(now):
+            anime_list = self.crawler_engine.crawl_season(year, season)
+            if anime_list is None:
+                key = self._season_key(year, season)
+                self.retry_after[key] = time.time() + self._min_interval_for(year, season)
+                continue
+
+            self.record_check(year, season, anime_list)
+            self._save_state()
+            checked += 1
+
+            # 在季度之間添加延遲
+            delay_range = REQUEST_CONFIG['season_delay_range']
+            add_random_delay(delay_range[0], delay_range[1])
+
+        if checked and self.on_checked is not None:
+            self.on_checked()
+        return checked
+
+    def seconds_until_next_check(self, now: float = None) -> float:
+        """
+        計算距離下一個季度到期的秒數，最長為 tick_interval
+
+        Args:
+            now: 目前時間戳記，預設為現在
+
+        Returns:
+            休眠秒數
+        """
+        now = now if now is not None else time.time()
+        seasons = calculate_seasons_from_year(DATA_CONFIG['start_year'])
+        next_due = min(self.next_check_time(*s) for s in seasons)
+        return min(max(next_due - now, 0), SCHEDULER_CONFIG['tick_interval'])
+
+    def run_forever(self, max_ticks: Optional[int] = None) -> None:
+        """
+        以常駐模式持續執行排程
+
+        Args:
+            max_ticks: 最多執行的輪數，預設為無限
+        """
+        logger.info("啟動自適應更新排程...")
+        ticks = 0
+        while max_ticks is None or ticks < max_ticks:
+            checked = self.tick()
+            if checked:
+                logger.info(f"本輪檢查了 {checked} 個季度")
+            ticks += 1
+            time.sleep(self.seconds_until_next_check())
@@ -0,0 +1,213 @@
+"""
+版本化快照儲存模組
+
+將每個季度的動畫列表以內容雜湊保存為去重的 blob，每次執行只寫入一份
+記錄各季度 blob 雜湊的快照清單，並可查詢任一次執行或時間點的資料。
+"""
+
+import functools
+import gzip
+import hashlib
+import json
+import os
+import time
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Union
+
+from config import SNAPSHOT_CONFIG
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotStore:
+    """
+    內容定址快照儲存
+
+    未變更的季度共用同一個 blob，儲存空間只隨資料變更量成長
+    """
+
+    def __init__(self, root: str = None, cache_size: int = None):
+        """
+        初始化快照儲存
+
+        Args:
+            root: 快照根目錄，預設使用配置檔案中的設定
+            cache_size: 已解碼季度的 LRU 快取數量，預設使用配置檔案中的設定
+        """
+        self.root = root or SNAPSHOT_CONFIG['root']
+        self.blob_dir = os.path.join(self.root, 'blobs')
+        self.manifest_dir = os.path.join(self.root, 'manifests')
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.manifest_dir, exist_ok=True)
+
+        cache_size = cache_size or SNAPSHOT_CONFIG['cache_size']
+        self._load_blob = functools.lru_cache(maxsize=cache_size)(self._read_blob)
+        # 快照清單寫入後不會再修改，以檔名快取已解析的清單，只讀取新增的檔案
+        self._manifests = {}
+        self._sorted_runs = []
+
+    def _blob_path(self, digest: str) -> str:
+        """取得 blob 的檔案路徑，以雜湊前兩碼分目錄"""
+        return os.path.join(self.blob_dir, digest[:2], f"{digest[2:]}.json.gz")
+
+    @staticmethod
+    def _write_atomic(path: str, content: bytes) -> None:
+        """先寫入暫存檔再取代，避免中斷時留下不完整的檔案"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _write_blob(self, anime_list: List[Dict[str, str]]) -> str:
+        """
+        寫入季度 blob，內容相同時不重複寫入
+
+        Args:
+            anime_list: 季度的動畫資訊列表
+
+        Returns:
+            內容的 SHA-256 雜湊
+        """
+        payload = json.dumps(anime_list, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(payload).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            # 固定 mtime，讓相同內容產生相同的壓縮檔
+            self._write_atomic(path, gzip.compress(payload, mtime=0))
+        return digest
+
+    def _read_blob(self, digest: str) -> List[Dict[str, str]]:
+        """讀取並解碼季度 blob"""
+        with open(self._blob_path(digest), 'rb') as f:
+            return json.loads(gzip.decompress(f.read()).decode('utf-8'))
+
+    def list_runs(self) -> List[Dict[str, Any]]:
+        """
+        列出所有快照清單，依時間排序
+
+        Returns:
+            快照清單列表
+        """
+        names = {name for name in os.listdir(self.manifest_dir) if name.endswith('.json')}
+        if names != self._manifests.keys():
+            # 移除已刪除的清單，只解析新增的檔案（包含其他行程寫入的快照）
+            self._manifests = {name: m for name, m in self._manifests.items() if name in names}
+            for name in names - self._manifests.keys():
+                try:
+                    with open(os.path.join(self.manifest_dir, name), 'r', encoding='utf-8') as f:
+                        self._manifests[name] = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    logger.warning(f"無法載入快照清單 {name}: {str(e)}")
+            self._sorted_runs = sorted(self._manifests.values(),
+                                       key=lambda m: (m['timestamp'], m['run_id']))
+        return list(self._sorted_runs)
+
+    def write_snapshot(self, data: Dict[str, Any], timestamp: float = None) -> str:
+        """
+        寫入一次執行的快照
+
+        如果所有季度都與最新快照相同，則不新增快照清單
+
+        Args:
+            data: 與資料檔案相同格式的資料字典
+            timestamp: 快照時間戳記，預設為現在
+
+        Returns:
+            快照的執行識別碼
+        """
+        timestamp = timestamp if timestamp is not None else time.time()
+        seasons = {
+            f"{year_key}/{season_key}": self._write_blob(anime_list)
+            for year_key, year_data in data.items()
+            for season_key, anime_list in year_data.items()
+        }
+
+        runs = self.list_runs()
+        if runs and runs[-1]['seasons'] == seasons:
+            logger.info(f"資料未變更，沿用快照 {runs[-1]['run_id']}")
+            return runs[-1]['run_id']
+
+        created_at = datetime.fromtimestamp(timestamp, tz=timezone.utc)
+        run_id = created_at.strftime('%Y%m%dT%H%M%S%fZ')
+        manifest = {
+            'run_id': run_id,
+            'timestamp': timestamp,
+            'created_at': created_at.isoformat(),
+            'seasons': seasons
+        }
+        content = json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8')
+        self._write_atomic(os.path.join(self.manifest_dir, f"{run_id}.json"), content)
+
+        logger.info(f"已寫入快照 {run_id}（{len(seasons)} 個季度）")
+        return run_id
+
+    def get_manifest(self, run_id: str = None,
+                     as_of: Union[float, datetime] = None) -> Optional[Dict[str, Any]]:
+        """
+        取得指定執行或時間點的快照清單
+
+        Args:
+            run_id: 執行識別碼
+            as_of: 時間戳記或 datetime，取該時間點（含）之前最新的快照
+
+        Returns:
+            快照清單，如果找不到則返回 None；兩者皆未指定時返回最新快照
+        """
+        runs = self.list_runs()
+        if run_id is not None:
+            return next((m for m in runs if m['run_id'] == run_id), None)
+
+        if as_of is not None:
+            if isinstance(as_of, datetime):
+                as_of = as_of.timestamp()
+            runs = [m for m in runs if m['timestamp'] <= as_of]
+
+        return runs[-1] if runs else None
+
+    def load_season(self, year: Union[int, str], season: str, run_id: str = None,
+                    as_of: Union[float, datetime] = None) -> Optional[List[Dict[str, str]]]:
+        """
+        載入指定快照中單一季度的資料
+
+        Args:
+            year: 年份
+            season: 季節（英文）
+            run_id: 執行識別碼
+            as_of: 時間戳記或 datetime
+
+        Returns:
+            動畫資訊列表，如果快照或季度不存在則返回 None
+        """
+        manifest = self.get_manifest(run_id, as_of)
+        if manifest is None:
+            return None
+        digest = manifest['seasons'].get(f"{year}/{season}")
+        if digest is None:
+            return None
+        return [dict(anime) for anime in self._load_blob(digest)]
+
+    def load_dataset(self, run_id: str = None,
+                     as_of: Union[float, datetime] = None) -> Dict[str, Any]:
+        """
+        載入指定快照的完整資料
+
+        Args:
+            run_id: 執行識別碼
+            as_of: 時間戳記或 datetime
+
+        Returns:
+            與資料檔案相同格式的資料字典，如果找不到快照則返回空字典
+        """
+        manifest = self.get_manifest(run_id, as_of)
+        if manifest is None:
+            return {}
+
+        data = {}
+        for key, digest in manifest['seasons'].items():
+            year_key, season_key = key.split('/', 1)
+            data.setdefault(year_key, {})[season_key] = [
+                dict(anime) for anime in self._load_blob(digest)
+            ]
+        return data
@@ -8,6 +8,7 @@ import logging
 import tempfile
 import os
 import sys
+import time
 from pathlib import Path
 
 # 將父目錄添加到 Python 路徑，以便導入主程式模組
@@ -76,6 +77,12 @@ def test_data_manager():
             assert len(data['2024']['spring']) == 1
             assert data['2024']['spring'][0]['title'] == '測試動畫'
             
+            # 更新欄位時替換整筆資料，先前取得的字典不受影響
+            before = data['2024']['spring'][0]
+            assert dm.update_anime_fields('test123', {'image': 'media/a.jpg'}) == 1
+            assert 'image' not in before
+            assert dm.get_data()['2024']['spring'][0]['image'] == 'media/a.jpg'
+            
             logger.info("✅ 資料管理器測試通過")
             return True
             
@@ -131,6 +138,604 @@ def test_main_app():
         logger.error(f"❌ 主應用程式類別測試失敗: {e}")
         return False
 
+def test_lease_coordinator():
+    """測試分片租約協調與部分結果合併"""
+    try:
+        from coordinator import (LeaseCoordinator, make_season_unit, merge_partial_results,
+                                 reset_shards)
+        from data_manager import AnimeDataManager
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # 租約時間為 0，模擬持有租約的工作者已經失效
+            coordinator = LeaseCoordinator(os.path.join(tmp_dir, 'coord.db'), lease_seconds=0)
+            assert coordinator.register_units([make_season_unit(2024, '春')]) == 1
+            assert coordinator.register_units([make_season_unit(2024, '春')]) == 0
+            
+            unit = coordinator.claim('worker-a')
+            assert unit['payload'] == {'year': 2024, 'season': '春'}
+            
+            # 逾期的租約會被其他工作者收回
+            reclaimed = coordinator.claim('worker-b')
+            assert reclaimed['unit_id'] == unit['unit_id']
+            assert not coordinator.complete(unit['unit_id'], 'worker-a')
+            assert coordinator.complete(unit['unit_id'], 'worker-b')
+            assert coordinator.claim('worker-a') is None
+            assert coordinator.remaining() == 0
+            coordinator.close()
+            
+            # 失敗的工作單元放回待處理，達到最大嘗試次數後才不再領取
+            coordinator = LeaseCoordinator(os.path.join(tmp_dir, 'retry.db'),
+                                           lease_seconds=60, max_attempts=2)
+            coordinator.register_units([make_season_unit(2024, '夏')])
+            unit = coordinator.claim('worker-a')
+            assert coordinator.fail(unit['unit_id'], 'worker-a')
+            assert coordinator.remaining() == 1
+            unit = coordinator.claim('worker-b')
+            assert unit is not None
+            assert coordinator.fail(unit['unit_id'], 'worker-b')
+            assert coordinator.claim('worker-a') is None
+            assert coordinator.remaining() == 0
+            
+            # 區塊執行期間背景續約
+            coordinator.lease_seconds = 0.3
+            coordinator.register_units([make_season_unit(2024, '秋')])
+            unit = coordinator.claim('worker-a')
+            with coordinator.keep_alive(unit['unit_id'], 'worker-a'):
+                time.sleep(0.5)
+                assert coordinator.claim('worker-b') is None
+            assert coordinator.complete(unit['unit_id'], 'worker-a')
+            coordinator.close()
+            
+            # 部分結果依檔名順序合併
+            partial_dir = os.path.join(tmp_dir, 'partial')
+            AnimeDataManager(os.path.join(partial_dir, 'worker-a.json')).save_anime(
+                2024, 'spring', {'title': '舊標題', 'cat_id': '1'})
+            AnimeDataManager(os.path.join(partial_dir, 'worker-b.json')).save_anime(
+                2024, 'spring', {'title': '新標題', 'cat_id': '1'})
+            
+            dm = AnimeDataManager(os.path.join(tmp_dir, 'anime_data.json'))
+            assert merge_partial_results(dm, partial_dir) == 1
+            assert dm.get_data()['2024']['spring'] == [{'title': '新標題', 'cat_id': '1'}]
+            
+            # 完成的工作單元不會再被領取，重設後新一輪才會重新爬取
+            import threading
+            import parser as parser_module
+            from parser import CrawlerEngine
+            
+            crawled = []
+            engine = CrawlerEngine(AnimeDataManager(os.path.join(tmp_dir, 'main.json')))
+            def fake_crawl_season(year, season, data_manager=None):
+                crawled.append((year, season))
+                anime_list = [{'title': f'第 {len(crawled)} 輪', 'cat_id': '9'}]
+                data_manager.save_anime(year, 'spring', anime_list[0])
+                return anime_list
+            engine.crawl_season = fake_crawl_season
+            
+            original_delay = parser_module.add_random_delay
+            parser_module.add_random_delay = lambda *args: None
+            try:
+                round_dir = os.path.join(tmp_dir, 'round')
+                round_coordinator = LeaseCoordinator(os.path.join(tmp_dir, 'round.db'))
+                seasons = [(2024, '春')]
+                written = []
+                original_save = AnimeDataManager._save_to_file
+                def tracking_save(self):
+                    written.append(threading.current_thread() is threading.main_thread())
+                    original_save(self)
+                AnimeDataManager._save_to_file = tracking_save
+                try:
+                    assert engine.crawl_sharded(seasons, 'worker-a', round_coordinator, round_dir) == 1
+                finally:
+                    AnimeDataManager._save_to_file = original_save
+                # 部分結果由背景執行緒寫入，不在爬取執行緒上同步寫入
+                assert written and not any(written)
+                assert engine.crawl_sharded(seasons, 'worker-a', round_coordinator, round_dir) == 0
+                
+                assert reset_shards(round_coordinator, round_dir) == 1
+                assert not os.listdir(round_dir)
+                assert engine.crawl_sharded(seasons, 'worker-b', round_coordinator, round_dir) == 1
+                assert crawled == [(2024, '春'), (2024, '春')]
+                
+                dm = AnimeDataManager(os.path.join(tmp_dir, 'round.json'))
+                assert merge_partial_results(dm, round_dir) == 1
+                assert dm.get_data()['2024']['spring'][0]['title'] == '第 2 輪'
+                round_coordinator.close()
+            finally:
+                parser_module.add_random_delay = original_delay
+        
+        logger.info("✅ 分片租約協調測試通過")
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ 分片租約協調測試失敗: {e}")
+        return False
+
+def test_refresh_scheduler():
+    """測試自適應更新排程"""
+    try:
+        from scheduler import RefreshScheduler
+        from config import SCHEDULER_CONFIG
+        from utils import calculate_recent_seasons
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            scheduler = RefreshScheduler(crawler_engine=object(),
+                                         state_file=os.path.join(tmp_dir, 'state.json'))
+            (year, season), _, (old_year, old_season) = calculate_recent_seasons(3)
+            anime_list = [{'title': '測試動畫', 'cat_id': '1'}]
+            hour = SCHEDULER_CONFIG['min_interval']
+            
+            day = 24 * hour
+            per_change = SCHEDULER_CONFIG['checks_per_change']
+            changed = anime_list + [{'title': '新動畫', 'cat_id': '2'}]
+            
+            # 當季從每小時開始，長時間沒有變更時間隔隨之拉長
+            assert scheduler.record_check(year, season, anime_list, now=0)['interval'] == hour
+            assert scheduler.record_check(year, season, anime_list, now=8 * day)['interval'] == 2 * day
+            
+            # 依變更紀錄的平均間隔決定檢查間隔：每 2 天變更一次
+            scheduler.record_check(year, season, changed, now=10 * day)
+            entry = scheduler.record_check(year, season, anime_list, now=12 * day)
+            assert entry['history'] == [10 * day, 12 * day]
+            assert entry['interval'] == 2 * day / per_change
+            assert scheduler.next_check_time(year, season) == 12 * day + entry['interval']
+            
+            # 剛變更後估計週期極短時，以最短間隔為下限
+            entry = scheduler.record_check(year, season, changed, now=12 * day + 60)
+            assert entry['interval'] == max((day + 30) / per_change, hour)
+            
+            # 較舊的季度有較長的最短檢查間隔
+            old_entry = scheduler.record_check(old_year, old_season, anime_list, now=12 * day)
+            assert old_entry['interval'] == hour * SCHEDULER_CONFIG['age_decay'] ** 2
+            
+            due = scheduler.due_seasons(now=12 * day + 8 * hour)
+            assert (year, season) in due
+            assert (old_year, old_season) not in due
+            
+            # 有季度完成檢查時呼叫後續處理（保存快照）
+            class FakeEngine:
+                def crawl_season(self, year, season):
+                    return anime_list
+            
+            checked_calls = []
+            scheduler = RefreshScheduler(FakeEngine(), os.path.join(tmp_dir, 'state2.json'),
+                                         on_checked=lambda: checked_calls.append(True))
+            scheduler.due_seasons = lambda now=None: [(year, season)]
+            import scheduler as scheduler_module
+            original_delay = scheduler_module.add_random_delay
+            scheduler_module.add_random_delay = lambda *args: None
+            try:
+                assert scheduler.tick() == 1
+            finally:
+                scheduler_module.add_random_delay = original_delay
+            assert checked_calls == [True]
+        
+        logger.info("✅ 自適應更新排程測試通過")
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ 自適應更新排程測試失敗: {e}")
+        return False
+
+def test_snapshot_store():
+    """測試版本化快照與時間點查詢"""
+    try:
+        from snapshot_store import SnapshotStore
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = SnapshotStore(os.path.join(tmp_dir, 'snapshots'))
+            first = {'2024': {'spring': [{'title': '測試動畫', 'cat_id': '1'}],
+                              'summer': [{'title': '夏季動畫', 'cat_id': '2'}]}}
+            second = {'2024': {'spring': first['2024']['spring'],
+                               'summer': [{'title': '夏季動畫 第二季', 'cat_id': '2'}]}}
+            
+            run_1 = store.write_snapshot(first, timestamp=1000)
+            run_2 = store.write_snapshot(second, timestamp=2000)
+            
+            # 未變更的季度共用同一個 blob，資料完全相同時不新增快照
+            blobs = [f for _, _, files in os.walk(store.blob_dir) for f in files]
+            assert len(blobs) == 3
+            assert store.write_snapshot(second, timestamp=3000) == run_2
+            assert len(store.list_runs()) == 2
+            
+            assert store.load_dataset(run_id=run_1) == first
+            assert store.load_dataset(as_of=1500) == first
+            assert store.load_dataset(as_of=2500) == second
+            assert store.load_dataset(as_of=500) == {}
+            assert store.load_season(2024, 'summer', as_of=1500) == first['2024']['summer']
+            
+            # 已解析的快照清單會被快取，查詢時只讀取新增的清單檔案
+            import builtins
+            opened = []
+            original_open = builtins.open
+            def counting_open(path, *args, **kwargs):
+                if 'manifests' in str(path):
+                    opened.append(path)
+                return original_open(path, *args, **kwargs)
+            
+            builtins.open = counting_open
+            try:
+                store.load_dataset(as_of=1500)
+                store.load_season(2024, 'spring', run_id=run_2)
+                assert opened == []
+                
+                # 其他實例（例如另一個行程）寫入的快照仍會被看到
+                third = {'2024': {'spring': [{'title': '春季動畫', 'cat_id': '3'}]}}
+                run_3 = SnapshotStore(store.root).write_snapshot(third, timestamp=4000)
+                opened.clear()
+                assert store.load_dataset() == third
+                assert [m['run_id'] for m in store.list_runs()] == [run_1, run_2, run_3]
+                assert len(opened) == 1
+            finally:
+                builtins.open = original_open
+        
+        logger.info("✅ 版本化快照測試通過")
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ 版本化快照測試失敗: {e}")
+        return False
+
+def test_background_writer():
+    """測試背景寫入執行緒合併寫入"""
+    try:
+        import json
+        from data_manager import AnimeDataManager
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            tmp_path = os.path.join(tmp_dir, 'anime_data.json')
+            dm = AnimeDataManager(tmp_path)
+            writer = dm.start_background_writer(debounce_interval=60)
+            
+            for i in range(50):
+                dm.save_anime(2024, 'spring', {'title': f'動畫 {i:02d}', 'cat_id': str(i)})
+            
+            # flush 略過防抖等待並確保所有請求已寫入
+            dm.flush()
+            with open(tmp_path, 'r', encoding='utf-8') as f:
+                assert len(json.load(f)['2024']['spring']) == 50
+            
+            # 佇列為空時 flush 不應留下旗標，之後的請求仍需經過防抖
+            dm.flush()
+            assert not writer._flush_requested.is_set()
+            assert not os.path.exists(f"{tmp_path}.tmp")
+            
+            dm.save_anime(2024, 'summer', {'title': '夏季動畫', 'cat_id': '100'})
+            dm.close()
+            with open(tmp_path, 'r', encoding='utf-8') as f:
+                assert 'summer' in json.load(f)['2024']
+            
+            stats = writer.get_stats()
+            assert stats['requests'] == 51
+            assert stats['writes'] < stats['requests']
+            assert stats['coalescing_ratio'] > 1
+        
+        logger.info("✅ 背景寫入測試通過")
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ 背景寫入測試失敗: {e}")
+        return False
+
+def test_page_archive_replay():
+    """測試網頁封存與離線重播"""
+    try:
+        from page_archive import PageArchive
+        from parser import ReplayEngine
+        from data_manager import AnimeDataManager
+        from utils import get_encoded_url
+        
+        html = """
+        <table>
+          <tr><th>星期一</th><th>星期二</th></tr>
+          <tr><td><a href="https://anime1.me/?cat=1">測試動畫</a></td>
+              <td><a href="https://anime1.me">Anime1.me</a></td></tr>
+        </table>
+        """
+        url = get_encoded_url(2024, '春')
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            archive_path = os.path.join(tmp_dir, 'pages.warc.gz')
+            archive = PageArchive(archive_path)
+            archive.record(url, 500, {}, b'error')
+            archive.record(url, 200, {'Content-Type': 'text/html; charset=utf-8'},
+                           html.encode('utf-8'), 'utf-8')
+            archive.record('https://anime1.me/?cat=1', 200, {}, b'')
+            
+            # 重新開啟時從索引載入位移
+            archive = PageArchive(archive_path)
+            assert len(archive.index) == 3
+            record = archive.read(archive.index[1])
+            assert record['status'] == 200
+            assert record['body'] == html.encode('utf-8')
+            
+            dm = AnimeDataManager(os.path.join(tmp_dir, 'anime_data.json'))
+            assert ReplayEngine(archive, dm).replay() == 1
+            assert dm.get_data()['2024']['spring'] == [{'title': '測試動畫', 'cat_id': '1'}]
+            
+            # 多個實例（如多個 --worker 行程）同時寫入同一個封存檔
+            import threading
+            writers = [PageArchive(archive_path) for _ in range(4)]
+            threads = [
+                threading.Thread(target=lambda a=a, n=n: [
+                    a.record(f'https://anime1.me/?cat={n}{i}', 200, {}, os.urandom(2000))
+                    for i in range(20)])
+                for n, a in enumerate(writers)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            
+            archive = PageArchive(archive_path)
+            assert len(archive.index) == 3 + 4 * 20
+            assert all(len(archive.read(entry)['body']) in (2000, 5, 0, len(html.encode('utf-8')))
+                       for entry in archive.index)
+            
+            # 沒有 fcntl 的平台（如 Windows）仍可匯入並寫入封存
+            import page_archive
+            original_fcntl, original_msvcrt = page_archive.fcntl, page_archive.msvcrt
+            page_archive.fcntl = page_archive.msvcrt = None
+            try:
+                entry = archive.record(url, 200, {}, b'portable')
+                assert PageArchive(archive_path).read(entry)['body'] == b'portable'
+            finally:
+                page_archive.fcntl, page_archive.msvcrt = original_fcntl, original_msvcrt
+        
+        logger.info("✅ 網頁封存與重播測試通過")
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ 網頁封存與重播測試失敗: {e}")
+        return False
+
+def test_binary_index():
+    """測試二進位索引匯出與 mmap 查詢"""
+    try:
+        from anime_index import AnimeIndexReader
+        from data_manager import AnimeDataManager
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dm = AnimeDataManager(os.path.join(tmp_dir, 'anime_data.json'))
+            dm.save_anime(2024, 'spring', {'title': '測試動畫', 'cat_id': '12'})
+            dm.save_anime(2024, 'spring', {'title': 'Another', 'cat_id': '3'})
+            dm.save_anime(2024, 'summer', {'title': '測試動畫 第二部分', 'cat_id': '12'})
+            dm.save_anime(2023, 'fall', {'title': '秋季動畫', 'cat_id': '7'})
+            
+            index_path = os.path.join(tmp_dir, 'anime_data.idx')
+            assert dm.export_binary_index(index_path) == 4
+            
+            with AnimeIndexReader(index_path) as reader:
+                # 跨季度的動畫會有多筆紀錄
+                assert [r['season'] for r in reader.lookup_cat_id('12')] == ['spring', 'summer']
+                assert reader.lookup_cat_id('999') == []
+                assert reader.lookup_title('秋季動畫') == [
+                    {'title': '秋季動畫', 'cat_id': '7', 'year': 2023, 'season': 'fall'}]
+                assert reader.lookup_title('不存在') == []
+                assert [r['title'] for r in reader.get_season(2024, 'spring')] == [
+                    'Another', '測試動畫']
+                assert reader.get_season(2024, 'fall') is None
+        
+        logger.info("✅ 二進位索引測試通過")
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ 二進位索引測試失敗: {e}")
+        return False
+
+def test_media_fetcher():
+    """測試封面圖片下載與內容定址儲存"""
+    try:
+        from media import MediaFetcher, MediaStore, extract_image_url
+        from data_manager import AnimeDataManager
+        from parser import AnimeParser
+        from transport import Transport
+        from utils import RateLimiter
+        
+        assert extract_image_url(
+            '<meta property="og:image" content="/cover.jpg">',
+            'https://anime1.me/?cat=1') == 'https://anime1.me/cover.jpg'
+        assert extract_image_url('<p>沒有圖片</p>', 'https://anime1.me/?cat=1') is None
+        
+        class FakeResponse:
+            def __init__(self, status_code, content=b'', headers=None):
+                self.status_code = status_code
+                self.content = content
+                self.text = content.decode('utf-8', errors='replace')
+                self.headers = headers or {}
+            
+            def raise_for_status(self):
+                if self.status_code >= 400:
+                    raise Exception(f"HTTP {self.status_code}")
+        
+        class FakeTransport(Transport):
+            """以固定內容回應，兩部動畫共用同一張圖片"""
+            def __init__(self):
+                super().__init__(RateLimiter(0))
+                self.requests = []
+            
+            def get(self, url, headers=None):
+                self.requests.append((url, headers))
+                if '?cat=' in url:
+                    return FakeResponse(200, b'<meta property="og:image" content="/same.png">')
+                if headers and headers.get('If-None-Match') == '"v1"':
+                    return FakeResponse(304)
+                return FakeResponse(200, b'PNGDATA', {'Content-Type': 'image/png', 'ETag': '"v1"'})
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            dm = AnimeDataManager(os.path.join(tmp_dir, 'anime_data.json'))
+            dm.save_anime(2024, 'spring', {'title': '動畫一', 'cat_id': '1'})
+            dm.save_anime(2024, 'spring', {'title': '動畫二', 'cat_id': '2'})
+            dm.save_anime(2024, 'summer', {'title': '動畫一 第二部分', 'cat_id': '1'})
+            
+            store = MediaStore(os.path.join(tmp_dir, 'media'))
+            transport = FakeTransport()
+            fetcher = MediaFetcher(dm, store, download_workers=2,
+                                   parser=AnimeParser(transport=transport))
+            fetcher.rate_limiter = RateLimiter(0)
+            
+            stats = fetcher.run()
+            assert stats == {'targets': 2, 'downloaded': 2, 'unique': 1}
+            # 分類頁面與圖片都透過解析器的抓取層取得
+            assert sorted(url for url, _ in transport.requests if '?cat=' in url) == [
+                'https://anime1.me/?cat=1', 'https://anime1.me/?cat=2']
+            originals = [f for _, _, files in os.walk(os.path.join(tmp_dir, 'media', 'originals'))
+                         for f in files]
+            assert len(originals) == 1
+            
+            data = dm.get_data()['2024']
+            assert data['spring'][0]['image'] == data['summer'][0]['image']
+            assert data['spring'][0]['image'].startswith('media/originals/')
+            
+            # 重新爬取時保留圖片欄位
+            dm.save_anime(2024, 'spring', {'title': '動畫一', 'cat_id': '1'})
+            assert 'image' in dm.get_data()['2024']['spring'][0]
+            
+            # 條件式重新下載，伺服器回應 304 時沿用快取
+            transport.requests.clear()
+            assert fetcher.run(refresh=True)['downloaded'] == 2
+            assert all(r[1].get('If-None-Match') == '"v1"'
+                       for r in transport.requests if '?cat=' not in r[0])
+            
+            # 記錄下載來源；重新爬取帶來新的圖片網址時，下次執行會取代舊圖片與縮圖
+            assert data['spring'][0]['image_source'] == data['spring'][0]['image_url']
+            assert fetcher.run()['targets'] == 0
+            dm.update_anime_fields('1', {'thumbnail': 'media/thumbs/old.jpg'})
+            dm.save_anime(2024, 'spring', {'title': '動畫一', 'cat_id': '1',
+                                           'image_url': 'https://anime1.me/new.png'})
+            transport.requests.clear()
+            assert fetcher.run()['targets'] == 1
+            assert [url for url, _ in transport.requests] == ['https://anime1.me/new.png']
+            for anime in dm.get_data()['2024']['spring'] + dm.get_data()['2024']['summer']:
+                if anime['cat_id'] == '1':
+                    assert anime['image_source'] == 'https://anime1.me/new.png'
+                    assert 'thumbnail' not in anime
+        
+        logger.info("✅ 封面圖片下載測試通過")
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ 封面圖片下載測試失敗: {e}")
+        return False
+
+def test_transport():
+    """測試可替換的抓取層"""
+    try:
+        from transport import RequestsTransport, Transport, create_transport
+        from page_archive import PageArchive
+        from parser import AnimeParser
+        from utils import RateLimiter
+        
+        assert isinstance(create_transport('http1'), RequestsTransport)
+        assert isinstance(create_transport('unknown'), RequestsTransport)
+        
+        # 抓取層介面必須實作 get
+        try:
+            Transport()
+            assert False, "Transport 應為抽象類別"
+        except TypeError:
+            pass
+        
+        class FakeResponse:
+            status_code = 200
+            headers = {}
+            encoding = 'utf-8'
+            
+            def __init__(self, url):
+                self.content = url.encode('utf-8')
+        
+        class FakeTransport(Transport):
+            def __init__(self, rate_limiter):
+                super().__init__(rate_limiter)
+                self.requested = []
+            
+            def get(self, url, headers=None):
+                self.requested.append(url)
+                return FakeResponse(url)
+        
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            transport = FakeTransport(RateLimiter(0.05))
+            archive = PageArchive(os.path.join(tmp_dir, 'pages.warc.gz'))
+            parser = AnimeParser(archive, transport)
+            
+            urls = [f"https://anime1.me/?cat={i}" for i in range(3)]
+            # 批次抓取遵守速率限制
+            start = time.monotonic()
+            responses = parser.fetch_pages(urls)
+            assert time.monotonic() - start >= 0.1
+            assert [r.content.decode('utf-8') for r in responses] == urls
+            assert transport.requested == urls
+            assert [entry['url'] for entry in archive.index] == urls
+        
+        import transport as transport_module
+        from transport import HTTP2Transport
+        
+        # 要求 HTTP/2 但未安裝 httpx[http2] 時退回 HTTP/1.1
+        original_httpx = transport_module.httpx
+        transport_module.httpx = None
+        try:
+            assert isinstance(create_transport('http2'), RequestsTransport)
+            try:
+                HTTP2Transport()
+                assert False, "未安裝 httpx 時應拋出 ImportError"
+            except ImportError:
+                pass
+        finally:
+            transport_module.httpx = original_httpx
+        
+        if transport_module.httpx is None:
+            logger.info("未安裝 httpx[http2]，略過 HTTP/2 傳輸測試")
+        else:
+            from concurrent.futures import ThreadPoolExecutor
+            from benchmarks.bench_transport import H2Protocol, make_page, start_http2_server
+            
+            http2 = create_transport('http2')
+            assert isinstance(http2, HTTP2Transport)
+            http2.close()
+            
+            import h2.connection
+            
+            # 多個執行緒（如圖片下載）同時呼叫 get，回應較慢時請求會在同一條連線上重疊。
+            # 放大串流編號分配後的間隔，讓多個執行緒共用同步連線時的競爭必定發生
+            original_next_id = h2.connection.H2Connection.get_next_available_stream_id
+            def slow_next_id(self):
+                stream_id = original_next_id(self)
+                time.sleep(0.02)
+                return stream_id
+            
+            port = start_http2_server(make_page(2000), 0.2)
+            http2 = HTTP2Transport(max_concurrency=8, prior_knowledge=True,
+                                   rate_limiter=RateLimiter(0))
+            h2.connection.H2Connection.get_next_available_stream_id = slow_next_id
+            try:
+                urls = [f"http://127.0.0.1:{port}/page/{i}" for i in range(12)]
+                with ThreadPoolExecutor(max_workers=4) as pool:
+                    responses = list(pool.map(http2.get, urls))
+                assert all(r.status_code == 200 for r in responses)
+                assert all(r.http_version == 'HTTP/2' for r in responses)
+            finally:
+                h2.connection.H2Connection.get_next_available_stream_id = original_next_id
+                http2.close()
+            
+            # 多批 get_many 與單一 get 都重複使用同一條連線
+            connections_before = H2Protocol.connections_made
+            http2 = HTTP2Transport(max_concurrency=8, prior_knowledge=True,
+                                   rate_limiter=RateLimiter(0))
+            try:
+                for batch in range(3):
+                    batch_urls = [f"http://127.0.0.1:{port}/batch/{batch}/{i}" for i in range(8)]
+                    assert all(r.status_code == 200 for r in http2.get_many(batch_urls))
+                assert http2.get(f"http://127.0.0.1:{port}/single").status_code == 200
+                assert H2Protocol.connections_made - connections_before == 1
+            finally:
+                http2.close()
+        
+        logger.info("✅ 抓取層測試通過")
+        return True
+        
+    except Exception as e:
+        logger.error(f"❌ 抓取層測試失敗: {e}")
+        return False
+
 def run_all_tests():
     """執行所有測試"""
     logger.info("開始執行動畫爬蟲測試...")
@@ -140,7 +745,15 @@ def run_all_tests():
         ("工具函數", test_utils_functions),
         ("資料管理器", test_data_manager),
         ("解析器類別", test_parser_classes),
-        ("主應用程式", test_main_app)
+        ("主應用程式", test_main_app),
+        ("分片租約協調", test_lease_coordinator),
+        ("自適應更新排程", test_refresh_scheduler),
+        ("版本化快照", test_snapshot_store),
+        ("背景寫入", test_background_writer),
+        ("網頁封存與重播", test_page_archive_replay),
+        ("二進位索引", test_binary_index),
+        ("封面圖片下載", test_media_fetcher),
+        ("抓取層", test_transport)
     ]
     
     passed = 0
@@ -0,0 +1,207 @@
+"""
+網路傳輸模組
+
+提供解析器使用的可替換抓取層：預設以 requests 走 HTTP/1.1，
+也可改用 httpx 以 HTTP/2 在同一條連線上多工並行抓取多個頁面。
+"""
+
+import abc
+import asyncio
+import logging
+import threading
+from typing import Dict, List
+
+import requests
+
+from config import TRANSPORT_CONFIG
+from utils import RateLimiter
+
+try:
+    import httpx
+    import h2  # noqa: F401  httpx 的 HTTP/2 支援需要 h2 套件
+except ImportError:  # httpx[http2] 為選用套件，未安裝時退回 HTTP/1.1
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+
+class Transport(abc.ABC):
+    """
+    抓取層介面
+
+    回應物件需提供 status_code、headers、content、text、encoding 與 raise_for_status()
+    """
+
+    name = 'base'
+
+    def __init__(self, rate_limiter: RateLimiter = None):
+        """
+        初始化傳輸
+
+        Args:
+            rate_limiter: get_many 發出每個請求前等待的速率限制器，可在多個元件間共用，
+                          預設依配置檔案的最短請求間隔建立
+        """
+        self.rate_limiter = rate_limiter or RateLimiter(TRANSPORT_CONFIG['min_request_interval'])
+
+    @abc.abstractmethod
+    def get(self, url: str, headers: Dict[str, str] = None):
+        """
+        發送單一 GET 請求
+
+        Args:
+            url: 目標 URL
+            headers: 請求標頭
+
+        Returns:
+            回應物件
+        """
+
+    def _throttled_get(self, url: str, headers: Dict[str, str] = None):
+        """等待速率限制後發送 GET 請求"""
+        self.rate_limiter.wait()
+        return self.get(url, headers)
+
+    def get_many(self, urls: List[str], headers: Dict[str, str] = None) -> list:
+        """
+        在速率限制下抓取多個頁面，預設依序發送
+
+        Args:
+            urls: 目標 URL 列表
+            headers: 請求標頭
+
+        Returns:
+            與 urls 順序相同的回應物件列表
+        """
+        return [self._throttled_get(url, headers) for url in urls]
+
+    def close(self) -> None:
+        """關閉連線"""
+
+
+class RequestsTransport(Transport):
+    """
+    HTTP/1.1 傳輸
+
+    使用 requests.Session，連續請求重複使用同一條 keep-alive 連線
+    """
+
+    name = 'http1'
+
+    def __init__(self, timeout: float = None, rate_limiter: RateLimiter = None):
+        """
+        初始化傳輸
+
+        Args:
+            timeout: 請求逾時（秒），預設使用配置檔案中的設定
+            rate_limiter: get_many 使用的速率限制器，預設依配置檔案建立
+        """
+        super().__init__(rate_limiter)
+        self.timeout = timeout or TRANSPORT_CONFIG['timeout']
+        self.session = requests.Session()
+
+    def get(self, url: str, headers: Dict[str, str] = None) -> requests.Response:
+        return self.session.get(url, headers=headers, timeout=self.timeout)
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class HTTP2Transport(Transport):
+    """
+    HTTP/2 傳輸
+
+    使用 httpx，所有請求在同一個長期存在的 AsyncClient 上執行，並行的請求會在同一條
+    HTTP/2 連線上以多個串流多工傳送；伺服器不支援 HTTP/2 時由 ALPN 協商退回 HTTP/1.1。
+
+    同步 Client 在多個執行緒間共用 HTTP/2 連線時，串流編號的分配與送出不在同一個鎖內，
+    可能以遞減順序送出而被伺服器中斷連線。因此 AsyncClient 只在專用執行緒的事件迴圈中
+    使用，get 與 get_many 可從任意執行緒呼叫。
+    """
+
+    name = 'http2'
+
+    def __init__(self, max_concurrency: int = None, timeout: float = None,
+                 prior_knowledge: bool = False, rate_limiter: RateLimiter = None):
+        """
+        初始化傳輸
+
+        Args:
+            max_concurrency: 同時進行的請求數量，預設使用配置檔案中的設定
+            timeout: 請求逾時（秒），預設使用配置檔案中的設定
+            prior_knowledge: 對明文 http:// 直接使用 HTTP/2（h2c），不協商 HTTP/1.1
+            rate_limiter: get_many 使用的速率限制器，預設依配置檔案建立
+
+        Raises:
+            ImportError: 未安裝 httpx[http2]
+        """
+        if httpx is None:
+            raise ImportError("HTTP/2 傳輸需要安裝 httpx[http2]")
+
+        super().__init__(rate_limiter)
+        self.max_concurrency = max_concurrency or TRANSPORT_CONFIG['max_concurrency']
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.loop_thread.start()
+        self.client = self._run(self._create_client(
+            http1=not prior_knowledge,
+            http2=True,
+            timeout=timeout or TRANSPORT_CONFIG['timeout'],
+            limits=httpx.Limits(max_connections=self.max_concurrency)
+        ))
+
+    async def _create_client(self, **options) -> 'httpx.AsyncClient':
+        """在事件迴圈中建立 AsyncClient 與限制並行數量的號誌"""
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        return httpx.AsyncClient(**options)
+
+    def _run(self, coro):
+        """在傳輸的事件迴圈中執行協程並等待結果"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def _request(self, url: str, headers: Dict[str, str] = None,
+                       throttled: bool = False) -> 'httpx.Response':
+        """在並行數量限制下發送請求，throttled 時先等待速率限制"""
+        async with self.semaphore:
+            if throttled:
+                # 速率限制只控制請求開始的間隔，回應較慢時多個請求仍會在連線上重疊
+                await asyncio.to_thread(self.rate_limiter.wait)
+            return await self.client.get(url, headers=headers)
+
+    def get(self, url: str, headers: Dict[str, str] = None) -> 'httpx.Response':
+        return self._run(self._request(url, headers))
+
+    def get_many(self, urls: List[str], headers: Dict[str, str] = None) -> list:
+        return self._run(self._get_many_async(urls, headers))
+
+    async def _get_many_async(self, urls: List[str], headers: Dict[str, str] = None) -> list:
+        """在同一個 AsyncClient 上並行抓取"""
+        return list(await asyncio.gather(*(self._request(url, headers, throttled=True)
+                                           for url in urls)))
+
+    def close(self) -> None:
+        self._run(self.client.aclose())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join()
+        self.loop.close()
+
+
+def create_transport(kind: str = None) -> Transport:
+    """
+    依設定建立傳輸
+
+    Args:
+        kind: 'http1' 或 'http2'，預設使用配置檔案中的設定
+
+    Returns:
+        傳輸實例；要求 HTTP/2 但未安裝 httpx[http2] 時返回 HTTP/1.1 傳輸
+    """
+    kind = kind or TRANSPORT_CONFIG['type']
+    if kind == HTTP2Transport.name:
+        try:
+            return HTTP2Transport()
+        except ImportError as e:
+            logger.warning(f"無法使用 HTTP/2 傳輸，改用 HTTP/1.1: {str(e)}")
+    elif kind != RequestsTransport.name:
+        logger.warning(f"未知的傳輸類型 {kind}，改用 HTTP/1.1")
+    return RequestsTransport()
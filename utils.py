@@ -6,8 +6,10 @@ import time
 import random
 import logging
 import functools
+import threading
+import re
 from datetime import datetime
-from urllib.parse import quote
+from urllib.parse import quote, unquote, urlparse
 from typing import List, Tuple, Optional
 
 from config import SEASON_MAPPING, SITE_CONFIG, REQUEST_CONFIG
@@ -69,6 +71,23 @@ def get_encoded_url(year: int, season: str) -> str:
     return f"{SITE_CONFIG['base_url']}/{encoded_path}"
 
 
+def parse_season_from_url(url: str) -> Optional[Tuple[int, str]]:
+    """
+    從季度頁面 URL 解析出年份和季節，為 get_encoded_url 的反向操作
+    
+    Args:
+        url: 季度頁面 URL
+        
+    Returns:
+        (年份, 季節)，如果不是季度頁面則返回 None
+    """
+    path = unquote(urlparse(url).path).strip('/')
+    match = re.fullmatch(r'(\d{4})年(.)季新番', path)
+    if not match or match.group(2) not in SEASON_MAPPING['chinese_to_english']:
+        return None
+    return int(match.group(1)), match.group(2)
+
+
 def get_current_season() -> str:
     """
     根據當前月份獲取對應的季節
@@ -110,6 +129,46 @@ def calculate_recent_seasons(seasons_count: int = 3) -> List[Tuple[int, str]]:
     return seasons_to_crawl
 
 
+def get_seasons_ago(year: int, season: str) -> int:
+    """
+    計算指定季度距今相隔幾季
+    
+    Args:
+        year: 年份
+        season: 季節（中文）
+        
+    Returns:
+        相隔的季數，當季為 0
+    """
+    seasons_order = SEASON_MAPPING['order']
+    current_index = datetime.now().year * 4 + seasons_order.index(get_current_season())
+    return current_index - (year * 4 + seasons_order.index(season))
+
+
+def calculate_seasons_from_year(start_year: int) -> List[Tuple[int, str]]:
+    """
+    計算從指定年份至今的所有季度
+    
+    Args:
+        start_year: 開始年份
+        
+    Returns:
+        (年份, 季節) 的列表，依時間順序排列
+    """
+    current_date = datetime.now()
+    current_year = current_date.year
+    current_month = current_date.month
+    
+    seasons_to_crawl = []
+    for year in range(start_year, current_year + 1):
+        for season in SEASON_MAPPING['order']:
+            if should_skip_season(year, season, current_year, current_month):
+                continue
+            seasons_to_crawl.append((year, season))
+    
+    return seasons_to_crawl
+
+
 def should_skip_season(year: int, season: str, current_year: int, current_month: int) -> bool:
     """
     判斷是否應該跳過某個季節
@@ -149,6 +208,35 @@ def add_random_delay(min_delay: float, max_delay: float) -> None:
     time.sleep(delay)
 
 
+class RateLimiter:
+    """
+    執行緒安全的速率限制器
+    
+    確保多個執行緒發出的請求之間至少間隔指定秒數
+    """
+    
+    def __init__(self, min_interval: float):
+        """
+        初始化速率限制器
+        
+        Args:
+            min_interval: 請求之間的最短間隔（秒）
+        """
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.next_allowed = 0.0
+    
+    def wait(self) -> None:
+        """阻塞直到可以發出下一個請求"""
+        with self.lock:
+            now = time.monotonic()
+            scheduled = max(now, self.next_allowed)
+            self.next_allowed = scheduled + self.min_interval
+        
+        if scheduled > now:
+            time.sleep(scheduled - now)
+
+
 def extract_cat_id_from_href(href: str) -> Optional[str]:
     """
     從 href 中提取 cat_id